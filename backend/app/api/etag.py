@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+_CACHE_CONTROL = "private, no-cache"
+
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def version_etag(*parts: Any) -> str:
+    # Weak: derived from a version stamp rather than the exact response bytes.
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return f'W/"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = _opaque(etag)
+    return any(_opaque(candidate) == wanted for candidate in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=304,
+        headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL},
+    )
+
+
+def serialize_json(payload: Any) -> bytes:
+    if isinstance(payload, BaseModel):
+        return payload.model_dump_json().encode("utf-8")
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def etag_json_response(
+    request: Request,
+    payload: Any,
+    *,
+    etag: Optional[str] = None,
+    body: Optional[bytes] = None,
+) -> Response:
+    # With a version `etag`, a matching request never pays for serialization.
+    if etag is not None and etag_matches(request, etag):
+        return not_modified(etag)
+    if body is None:
+        body = serialize_json(payload)
+    if etag is None:
+        etag = content_etag(body)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": _CACHE_CONTROL},
+    )
@@ -1,28 +1,52 @@
 import hashlib
-import json
 import logging
+import random
 import re
-from datetime import datetime, timedelta, timezone
-from functools import lru_cache
-from typing import Any, Dict, List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Header
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token as google_id_token
-from google.oauth2 import service_account
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, File, UploadFile, Header
 import jwt
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 import requests
 from firebase_admin import auth as admin_auth
+from google.api_core import exceptions as gcloud_exceptions
+from firebase_admin import firestore as admin_firestore
 
+from ...app_store_server import AppStoreServerError, get_app_store_server_client
+from ...apple_jws import AppleJWSError, load_root_certificate, verify_signed_transaction
 from ...config import Settings, get_settings
 from ...firebase import (
+    cache_user_record,
     create_custom_token,
     get_or_create_user,
     get_firestore_client,
+    get_user_record,
     init_firebase,
+    invalidate_user_record,
+    revoke_verified_claims,
+    verify_id_token,
+)
+from ...config_cache import (
+    ads_config_cache,
+    plan_permissions_cache,
+    start_config_caches,
+    tariff_plans_cache,
 )
-from ...fx import get_cbu_rates
+from ...core.cache import TTLCache
+from ...fx import (
+    DEFAULT_BASE_CURRENCY,
+    DEFAULT_CURRENCY,
+    conversion_factor,
+    convert_amounts,
+    get_cbu_rates,
+)
+from ...google_play import GooglePlayClient, GooglePlayError, get_google_play_client
+from ...jobs import start_periodic_job, stop_all_jobs
+from ...identity_keys import KeyStoreError, apple_key_store, google_cert_store
 from ...notifications import (
     AdminBroadcastNotificationRequest,
     AdminBroadcastNotificationResponse,
@@ -37,7 +61,6 @@ from ...notifications import (
     PushTokenUnregisterRequest,
     PushTokenUnregisterResponse,
     broadcast_notification_to_all_users,
-    create_overspending_notification,
     get_unread_notification_count,
     list_user_notifications,
     mark_all_notifications_read,
@@ -46,6 +69,29 @@ from ...notifications import (
     unregister_push_token,
 )
 from ...openai_client import analyze_transaction_text, OpenAIError
+from ...overspending import evaluate_overspending, users_with_plan_budgets
+from ...rollups import (
+    iter_cells,
+    load_rollups,
+    rollup_month,
+    wallet_currencies,
+    write_rollup_increments,
+)
+from ...wallets import (
+    available_balance,
+    read_wallet_totals,
+    totals_fields,
+    transaction_delta,
+    wallet_totals_in_transaction,
+)
+from ..etag import (
+    content_etag,
+    etag_json_response,
+    etag_matches,
+    not_modified,
+    serialize_json,
+    version_etag,
+)
 
 logger = logging.getLogger("auth")
 logging.basicConfig(level=logging.INFO)
@@ -114,6 +160,75 @@ class VoiceCommitRequest(BaseModel):
     currency: Optional[str] = None
     note: Optional[Dict[str, Any]] = None
     date: Optional[str] = None
+    # Client-generated id, used as the transaction doc id so retries are idempotent.
+    client_id: Optional[str] = None
+
+
+class VoiceCommitBatchRequest(BaseModel):
+    items: List[VoiceCommitRequest]
+
+
+class VoiceCommitBatchItemResult(BaseModel):
+    index: int
+    status_code: int
+    transaction: Optional[Dict[str, Any]] = None
+    detail: Optional[str] = None
+
+
+class VoiceCommitBatchResponse(BaseModel):
+    results: List[VoiceCommitBatchItemResult]
+    committed: int
+    failed: int
+
+
+class NetWorthCurrency(BaseModel):
+    currency: str
+    wallet_count: int
+    balance: float
+    converted: Optional[float] = None
+    change: Optional[float] = None
+
+
+class NetWorthResponse(BaseModel):
+    currency: str
+    total: float
+    change: float
+    currencies: List[NetWorthCurrency]
+    rates_date: Optional[str] = None
+    previous_date: Optional[str] = None
+    # Currencies without a CBU rate; left out of total and change.
+    unconverted: List[str] = Field(default_factory=list)
+
+
+class UserStatsPoint(BaseModel):
+    start: str
+    income: float
+    expense: float
+
+
+class UserStatsCategory(BaseModel):
+    category_id: str
+    name: Optional[str] = None
+    icon: Optional[str] = None
+    income: float
+    expense: float
+
+
+class UserStatsResponse(BaseModel):
+    currency: str
+    granularity: str
+    start: str
+    end: str
+    income: float
+    expense: float
+    series: List[UserStatsPoint]
+    categories: List[UserStatsCategory]
+    # Categories are kept per month, so they cover these whole months (YYYY-MM),
+    # which can reach past start/end for day and week ranges.
+    categories_months: List[str] = Field(default_factory=list)
+    rates_date: Optional[str] = None
+    # Currencies without a CBU rate; their amounts are left out.
+    unconverted_currencies: List[str] = Field(default_factory=list)
 
 
 class AdminPlanUpdateRequest(BaseModel):
@@ -182,10 +297,17 @@ class AdminUserListResponse(BaseModel):
     next_page_token: Optional[str] = None
 
 
+class AdminAuthCacheClearResponse(BaseModel):
+    uid: str
+    cleared: int = 0
+
+
 class GoogleIapVerifyRequest(BaseModel):
     product_id: str
     purchase_token: str
     is_subscription: bool = True
+    # Skip the stored-entitlement shortcut and always ask Google.
+    force: bool = False
 
 
 class AppleIapVerifyRequest(BaseModel):
@@ -193,6 +315,28 @@ class AppleIapVerifyRequest(BaseModel):
     product_id: Optional[str] = None
 
 
+class IapAckQueueItem(BaseModel):
+    id: str
+    kind: Optional[str] = None
+    product_id: Optional[str] = None
+    status: Optional[str] = None
+    attempts: int = 0
+    next_attempt_at: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    acknowledged_at: Optional[str] = None
+
+
+class IapAckQueueResponse(BaseModel):
+    items: List[IapAckQueueItem]
+
+
+class AppleSignedTransactionVerifyRequest(BaseModel):
+    signed_transaction: str
+    product_id: Optional[str] = None
+
+
 class IapVerifyResponse(BaseModel):
     profile: UserProfileResponse
     platform: str
@@ -322,11 +466,49 @@ class TrialStartResponse(BaseModel):
     tariff: TariffPlanResponse
 
 
+class BootstrapSectionError(BaseModel):
+    status_code: int
+    detail: str
+
+
+class BootstrapResponse(BaseModel):
+    profile: UserProfileResponse
+    permissions: UserPermissionsResponse
+    ads_config: Optional[AdsConfigResponse] = None
+    tariffs: Optional[TariffPlanListResponse] = None
+    fx_rates: Optional[FxRatesResponse] = None
+    notifications: Optional[NotificationUnreadCountResponse] = None
+    errors: Dict[str, BootstrapSectionError] = Field(default_factory=dict)
+
+
+class UserContext(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    uid: str
+    claims: Dict[str, Any]
+    email: Optional[str] = None
+    display_name: Optional[str] = None
+    profile: UserProfileResponse
+    access_plan: str = "free"
+    permissions: Dict[str, Any] = Field(default_factory=dict)
+
+
 _TARIFF_ACCESS_PLANS = {"free", "premium"}
 _TARIFF_PURCHASE_TYPES = {"subscription", "one_time"}
 _TARIFF_BILLING_UNITS = {"day", "week", "month", "year", "lifetime"}
 _TARIFF_STORE_PLATFORMS = {"ios", "android"}
 _TRIAL_STATUSES = {"none", "active", "expired", "converted", "canceled"}
+_PROFILE_CLAIM_KEYS = ("plan", "is_premium", "access_plan")
+_FIRESTORE_BATCH_LIMIT = 500
+_AUTH_LOOKUP_BATCH_LIMIT = 100
+_VOICE_COMMIT_BATCH_MAX_ITEMS = 500
+_STATS_GRANULARITIES = {"day", "week", "month"}
+_STATS_MAX_MONTHS = 24
+_OVERSPENDING_SWEEP_CONCURRENCY = 4
+_REQUEST_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="request-fanout")
+# Fire-and-forget work started by a request (Google acks, post-commit checks). Kept
+# off _REQUEST_EXECUTOR so slow upstream calls never queue request fan-out behind them.
+_BACKGROUND_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="background")
 
 
 _AUDIO_MIME_ALIASES = {
@@ -365,9 +547,27 @@ def _normalize_audio_mime(content_type: str | None, filename: str | None) -> str
 
 
 def verify_google_token(id_token: str, settings: Settings) -> Dict[str, Any]:
-    request = google_requests.Request()
     try:
-        claims = google_id_token.verify_oauth2_token(id_token, request, audience=settings.valid_audiences)
+        kid = str(jwt.get_unverified_header(id_token).get("kid") or "").strip()
+        try:
+            public_key = google_cert_store.get_key(kid) if kid else None
+        except KeyStoreError as exc:
+            # Our side can't reach Google; not the client's token at fault.
+            logger.warning("Google keys unavailable: %s", exc)
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail="Google keys fetch failed",
+            ) from exc
+        if public_key is None:
+            raise jwt.InvalidTokenError(f"Unknown Google signing key id: {kid or '<missing>'}")
+        claims = jwt.decode(
+            id_token,
+            public_key,
+            algorithms=["RS256"],
+            audience=settings.valid_audiences,
+        )
+    except HTTPException:
+        raise
     except Exception as exc:  # broad but surfaces to client
         logger.warning("Google token verification failed: %s", exc)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Google token") from exc
@@ -386,59 +586,21 @@ def verify_google_token(id_token: str, settings: Settings) -> Dict[str, Any]:
     return claims
 
 
-def _apple_auth_audiences(settings: Settings) -> set[str]:
-    configured = set(settings.apple_auth_audience_set)
-    if configured:
-        return configured
-    if settings.apple_bundle_id:
-        return {settings.apple_bundle_id.strip()}
-    return set()
-
-
-@lru_cache(maxsize=8)
-def _apple_jwks_for_hour(hour_bucket: int) -> Dict[str, Any]:
-    response = requests.get(_APPLE_AUTH_KEYS_URL, timeout=20)
-    if response.status_code >= 400:
+def _get_apple_signing_key(kid: str):
+    try:
+        public_key = apple_key_store.get_key(kid)
+    except KeyStoreError as exc:
+        logger.warning("Apple keys unavailable: %s", exc)
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="Apple keys fetch failed",
-        )
-    data = response.json()
-    keys = data.get("keys")
-    if not isinstance(keys, list) or not keys:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail="Apple keys response invalid",
-        )
-    return data
-
-
-def _get_apple_jwks(refresh: bool = False) -> Dict[str, Any]:
-    if refresh:
-        _apple_jwks_for_hour.cache_clear()
-    bucket = int(datetime.now(timezone.utc).timestamp() // 3600)
-    return _apple_jwks_for_hour(bucket)
-
-
-def _get_apple_signing_key(kid: str):
-    def resolve_key(jwks: Dict[str, Any], requested_kid: str) -> Optional[Dict[str, Any]]:
-        keys = jwks.get("keys") or []
-        for item in keys:
-            if isinstance(item, dict) and item.get("kid") == requested_kid:
-                return item
-        return None
-
-    jwks = _get_apple_jwks(refresh=False)
-    key_data = resolve_key(jwks, kid)
-    if not key_data:
-        jwks = _get_apple_jwks(refresh=True)
-        key_data = resolve_key(jwks, kid)
-    if not key_data:
+        ) from exc
+    if public_key is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Apple signing key not found",
         )
-    return jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key_data))
+    return public_key
 
 
 def verify_apple_identity_token(payload: AppleAuthRequest, settings: Settings) -> Dict[str, Any]:
@@ -446,7 +608,7 @@ def verify_apple_identity_token(payload: AppleAuthRequest, settings: Settings) -
     if not token:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing Apple identity token")
 
-    audiences = _apple_auth_audiences(settings)
+    audiences = settings.apple_auth_audience_set
     if not audiences:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -521,7 +683,7 @@ def require_firebase_user(authorization: str = Header(default=None)) -> Dict[str
             detail="Missing auth token",
         )
     try:
-        return admin_auth.verify_id_token(token)
+        return verify_id_token(token)
     except Exception as exc:
         logger.warning("Firebase token verification failed: %s", exc)
         raise HTTPException(
@@ -711,10 +873,16 @@ def _derive_name(email: Optional[str], display_name: Optional[str]) -> str:
     return "User"
 
 
-def _ensure_user_profile(uid: str, email: Optional[str], display_name: Optional[str]) -> Dict[str, Any]:
+def _ensure_user_profile(
+    uid: str,
+    email: Optional[str],
+    display_name: Optional[str],
+    snapshot=None,
+) -> Dict[str, Any]:
     db = get_firestore_client()
     user_ref = db.collection("users").document(uid)
-    snapshot = user_ref.get()
+    if snapshot is None:
+        snapshot = user_ref.get()
     now_iso = datetime.now(timezone.utc).isoformat()
     fallback_name = _derive_name(email, display_name)
     if not snapshot.exists:
@@ -737,26 +905,20 @@ def _ensure_user_profile(uid: str, email: Optional[str], display_name: Optional[
         updates["name"] = fallback_name
     if not data.get("email") and email:
         updates["email"] = email
-    normalized_state = _normalize_user_subscription_state(data)
-    for key, value in normalized_state.items():
-        if data.get(key) != value:
-            updates[key] = value
     if updates:
         updates["updated_at"] = now_iso
         user_ref.set(updates, merge=True)
         data.update(updates)
+    # Expired trials/subscriptions are persisted by the expiry sweeper; readers
+    # only see the normalized state in memory.
+    data.update(_normalize_user_subscription_state(data))
     return data
 
 
 def _normalize_profile(uid: str, data: Dict[str, Any]) -> UserProfileResponse:
+    # Persisting the normalized state is the job of _apply_profile_state and the
+    # expiry sweeper; this only shapes the response.
     normalized_state = _normalize_user_subscription_state(data)
-    updates: Dict[str, Any] = {}
-    for key, value in normalized_state.items():
-        if data.get(key) != value:
-            updates[key] = value
-    if updates:
-        _update_user_profile(uid, updates)
-        data.update(updates)
     plan = normalized_state["plan"]
     access_plan = normalized_state["access_plan"]
     is_premium = normalized_state["is_premium"]
@@ -791,13 +953,6 @@ def _normalize_profile(uid: str, data: Dict[str, Any]) -> UserProfileResponse:
     )
 
 
-def _update_user_profile(uid: str, updates: Dict[str, Any]) -> None:
-    db = get_firestore_client()
-    user_ref = db.collection("users").document(uid)
-    updates = {**updates, "updated_at": datetime.now(timezone.utc).isoformat()}
-    user_ref.set(updates, merge=True)
-
-
 def _update_custom_claims(uid: str, updates: Dict[str, Any]) -> None:
     try:
         user = admin_auth.get_user(uid)
@@ -806,6 +961,49 @@ def _update_custom_claims(uid: str, updates: Dict[str, Any]) -> None:
         admin_auth.set_custom_user_claims(uid, claims)
     except Exception as exc:
         logger.warning("Failed to update custom claims for uid=%s: %s", uid, exc)
+    finally:
+        invalidate_user_record(uid)
+
+
+def _claims_state(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: data.get(key) for key in _PROFILE_CLAIM_KEYS}
+
+
+def _apply_profile_state(
+    uid: str,
+    mutate: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Apply one profile state change in a single transaction.
+
+    `mutate` receives the current users/{uid} data and returns the fields to change.
+    The merged result is normalized, only differing fields are written, custom
+    claims are touched only when plan/is_premium/access_plan moved, and the final
+    document is returned so callers don't need to read it back.
+    """
+    db = get_firestore_client()
+    user_ref = db.collection("users").document(uid)
+
+    @admin_firestore.transactional
+    def run(transaction) -> tuple[Dict[str, Any], Dict[str, Any]]:
+        snapshot = user_ref.get(transaction=transaction)
+        current = (snapshot.to_dict() or {}) if snapshot.exists else {}
+        patch = mutate(dict(current)) if mutate else {}
+        normalized_state = _normalize_user_subscription_state({**current, **patch})
+        updates = {
+            key: value
+            for key, value in {**patch, **normalized_state}.items()
+            if key not in current or current.get(key) != value
+        }
+        if updates:
+            updates["updated_at"] = datetime.now(timezone.utc).isoformat()
+            transaction.set(user_ref, updates, merge=True)
+        return {**current, **updates}, current
+
+    final_data, previous_data = run(db.transaction())
+    final_claims = _claims_state(final_data)
+    if final_claims != _claims_state(previous_data):
+        _update_custom_claims(uid, final_claims)
+    return final_data
 
 
 def _set_user_plan(
@@ -816,50 +1014,111 @@ def _set_user_plan(
     premium_until: Optional[str] = None,
     premium_status: Optional[str] = None,
     tariff_id: Optional[str] = None,
-) -> None:
-    db = get_firestore_client()
-    user_ref = db.collection("users").document(uid)
-    existing_snapshot = user_ref.get()
-    existing_data = existing_snapshot.to_dict() if existing_snapshot.exists else {}
-
+) -> Dict[str, Any]:
     plan = _normalize_account_plan_name(plan, default="free")
     is_premium = _compute_is_premium(plan, premium_until, premium_status)
-    now_iso = datetime.now(timezone.utc).isoformat()
-    payload: Dict[str, Any] = {
-        "plan": plan,
-        "is_premium": is_premium,
-        "premium_source": source,
-        "premium_since": now_iso if is_premium else None,
-        "premium_until": premium_until,
-        "premium_status": premium_status,
-    }
-    if plan == "premium":
-        payload["active_tariff_id"] = tariff_id or existing_data.get("active_tariff_id")
-        payload["pending_tariff_id"] = None
-        if existing_data.get("trial_status") == "active":
-            payload["trial_status"] = "converted"
-            payload["trial_converted_at"] = now_iso
-    else:
-        payload["active_tariff_id"] = None
-        if tariff_id:
-            payload["pending_tariff_id"] = tariff_id
 
-    normalized_state = _normalize_user_subscription_state({**existing_data, **payload})
-    for key, value in normalized_state.items():
-        if payload.get(key) != value:
-            payload[key] = value
+    def mutate(existing_data: Dict[str, Any]) -> Dict[str, Any]:
+        now_iso = datetime.now(timezone.utc).isoformat()
+        premium_since = None
+        if is_premium:
+            # Re-verifying an already active subscription keeps its original start.
+            was_premium = bool(existing_data.get("is_premium")) and existing_data.get("plan") == "premium"
+            premium_since = (existing_data.get("premium_since") if was_premium else None) or now_iso
+        payload: Dict[str, Any] = {
+            "plan": plan,
+            "is_premium": is_premium,
+            "premium_source": source,
+            "premium_since": premium_since,
+            "premium_until": premium_until,
+            "premium_status": premium_status,
+        }
+        if plan == "premium":
+            payload["active_tariff_id"] = tariff_id or existing_data.get("active_tariff_id")
+            payload["pending_tariff_id"] = None
+            if existing_data.get("trial_status") == "active":
+                payload["trial_status"] = "converted"
+                payload["trial_converted_at"] = now_iso
+        else:
+            payload["active_tariff_id"] = None
+            if tariff_id:
+                payload["pending_tariff_id"] = tariff_id
+        return payload
 
-    _update_user_profile(uid, payload)
-    _update_custom_claims(
-        uid,
-        {
-            "plan": normalized_state["plan"],
-            "is_premium": normalized_state["is_premium"],
-            "access_plan": normalized_state["access_plan"],
-        },
+    return _apply_profile_state(uid, mutate)
+
+
+def _sweep_subscription_expiries(since: Optional[datetime]) -> None:
+    db = get_firestore_client()
+    users = db.collection("users")
+    now = datetime.now(timezone.utc)
+    upper = now.isoformat()
+    # Only look at expiries that fell due since the previous sweep (with some
+    # overlap); the first run scans everything already past due.
+    lower = (since - timedelta(hours=1)).isoformat() if since else None
+
+    candidates: Dict[str, Any] = {}
+    for field in ("premium_until", "trial_ends_at"):
+        query = users.where(field, "<=", upper)
+        if lower:
+            query = query.where(field, ">", lower)
+        for snapshot in query.stream():
+            candidates[snapshot.id] = snapshot
+
+    claim_updates: Dict[str, Dict[str, Any]] = {}
+    conflicts = 0
+    for uid, snapshot in candidates.items():
+        data = snapshot.to_dict() or {}
+        normalized_state = _normalize_user_subscription_state(data)
+        updates = {key: value for key, value in normalized_state.items() if data.get(key) != value}
+        if not updates:
+            continue
+        updates["updated_at"] = upper
+        # Only if the profile is unchanged since it was read: a renewal written in
+        # between (purchase, reconciler, admin) must not be flipped back to free.
+        try:
+            snapshot.reference.update(
+                updates, option=db.write_option(last_update_time=snapshot.update_time)
+            )
+        except gcloud_exceptions.FailedPrecondition:
+            conflicts += 1
+            continue
+        final_claims = _claims_state({**data, **updates})
+        if final_claims != _claims_state(data):
+            claim_updates[uid] = final_claims
+
+    _bulk_update_custom_claims(claim_updates)
+    logger.info(
+        "Subscription sweep checked=%s claims_updated=%s skipped_changed=%s",
+        len(candidates),
+        len(claim_updates),
+        conflicts,
     )
 
 
+def _bulk_update_custom_claims(updates_by_uid: Dict[str, Dict[str, Any]]) -> None:
+    uids = list(updates_by_uid)
+    for start in range(0, len(uids), _AUTH_LOOKUP_BATCH_LIMIT):
+        chunk = uids[start : start + _AUTH_LOOKUP_BATCH_LIMIT]
+        try:
+            result = admin_auth.get_users([admin_auth.UidIdentifier(uid) for uid in chunk])
+        except Exception as exc:
+            logger.warning("Bulk claims lookup failed for %s users: %s", len(chunk), exc)
+            continue
+        for record in result.users:
+            claims = dict(record.custom_claims or {})
+            wanted = updates_by_uid[record.uid]
+            if all(claims.get(key) == value for key, value in wanted.items()):
+                continue
+            claims.update(wanted)
+            try:
+                admin_auth.set_custom_user_claims(record.uid, claims)
+            except Exception as exc:
+                logger.warning("Failed to update custom claims for uid=%s: %s", record.uid, exc)
+            finally:
+                invalidate_user_record(record.uid)
+
+
 def _auth_user_to_dict(user: admin_auth.UserRecord) -> UserAuthResponse:
     return UserAuthResponse(
         uid=user.uid,
@@ -895,18 +1154,6 @@ def _to_float(value: Any, default: float = 0.0) -> float:
     return parsed
 
 
-def _wallet_net_balance(wallet: Dict[str, Any], transactions: List[Dict[str, Any]]) -> float:
-    net = _to_float(wallet.get("balance"), default=0.0)
-    for tx in transactions:
-        amount = _to_float(tx.get("balance"), default=0.0)
-        tx_type = str(tx.get("type") or "").strip().lower()
-        if tx_type == "income":
-            net += amount
-        elif tx_type == "expensese":
-            net -= amount
-    return net
-
-
 def _get_user_full_data(uid: str) -> Dict[str, Any]:
     db = get_firestore_client()
     user_ref = db.collection("users").document(uid)
@@ -916,14 +1163,7 @@ def _get_user_full_data(uid: str) -> Dict[str, Any]:
 
     data = snapshot.to_dict() or {}
     data["uid"] = uid
-    updates: Dict[str, Any] = {}
-    normalized_state = _normalize_user_subscription_state(data)
-    for key, value in normalized_state.items():
-        if data.get(key) != value:
-            updates[key] = value
-    if updates:
-        _update_user_profile(uid, updates)
-        data.update(updates)
+    data.update(_normalize_user_subscription_state(data))
 
     wallets = []
     for wallet_doc in user_ref.collection("wallets").stream():
@@ -970,11 +1210,9 @@ def _normalize_permissions(raw: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def _get_plan_permissions(plan: str) -> Dict[str, Any]:
-    db = get_firestore_client()
-    doc = db.collection("plan_permissions").document(plan).get()
-    if not doc.exists:
+    data = plan_permissions_cache.get(plan)
+    if data is None:
         return {}
-    data = doc.to_dict() or {}
     permissions = data.get("permissions") or {}
     if isinstance(permissions, dict):
         return _normalize_permissions(permissions)
@@ -982,11 +1220,9 @@ def _get_plan_permissions(plan: str) -> Dict[str, Any]:
 
 
 def _get_plan_permissions_doc(plan: str) -> Dict[str, Any]:
-    db = get_firestore_client()
-    doc = db.collection("plan_permissions").document(plan).get()
-    if not doc.exists:
+    data = plan_permissions_cache.get(plan)
+    if data is None:
         return {"permissions": {}, "updated_at": None}
-    data = doc.to_dict() or {}
     permissions = data.get("permissions") or {}
     if not isinstance(permissions, dict):
         permissions = {}
@@ -996,6 +1232,37 @@ def _get_plan_permissions_doc(plan: str) -> Dict[str, Any]:
     }
 
 
+def _get_user_snapshot(uid: str):
+    db = get_firestore_client()
+    return db.collection("users").document(uid).get()
+
+
+def require_user_context(user: Dict[str, Any] = Depends(require_firebase_user)) -> UserContext:
+    uid = str(user.get("uid"))
+    # Auth record and profile doc don't depend on each other, so fetch them together.
+    auth_future = _REQUEST_EXECUTOR.submit(get_user_record, uid)
+    snapshot_future = _REQUEST_EXECUTOR.submit(_get_user_snapshot, uid)
+    auth_user = auth_future.result()
+    profile_data = _ensure_user_profile(
+        uid,
+        auth_user.email,
+        auth_user.display_name,
+        snapshot=snapshot_future.result(),
+    )
+    profile = _normalize_profile(uid, profile_data)
+    access_plan = _normalize_account_plan_name(profile.access_plan, default="free")
+    permissions = _get_plan_permissions(access_plan)
+    return UserContext(
+        uid=uid,
+        claims=user,
+        email=auth_user.email,
+        display_name=auth_user.display_name,
+        profile=profile,
+        access_plan=access_plan,
+        permissions=permissions,
+    )
+
+
 def _set_plan_permissions(plan: str, permissions: Dict[str, Any], merge: bool = True) -> Dict[str, Any]:
     db = get_firestore_client()
     now_iso = datetime.now(timezone.utc).isoformat()
@@ -1004,9 +1271,11 @@ def _set_plan_permissions(plan: str, permissions: Dict[str, Any], merge: bool =
         existing = _get_plan_permissions(plan)
         merged = {**existing, **_normalize_permissions(permissions)}
         plan_ref.set({"permissions": merged, "updated_at": now_iso}, merge=True)
+        plan_permissions_cache.put(plan, {"permissions": merged, "updated_at": now_iso})
         return {"permissions": merged, "updated_at": now_iso}
     normalized = _normalize_permissions(permissions)
     plan_ref.set({"permissions": normalized, "updated_at": now_iso})
+    plan_permissions_cache.put(plan, {"permissions": normalized, "updated_at": now_iso})
     return {"permissions": normalized, "updated_at": now_iso}
 
 
@@ -1243,28 +1512,81 @@ def _tariff_doc_to_response(doc_id: str, raw: Dict[str, Any]) -> TariffPlanRespo
     )
 
 
-def _list_tariffs(*, include_inactive: bool = False, platform: Optional[str] = None) -> List[TariffPlanResponse]:
-    platform = _normalize_ads_platform(platform) if platform else None
-    db = get_firestore_client()
-    tariffs: List[TariffPlanResponse] = []
-    for doc in db.collection("tariff_plans").stream():
-        tariff = _tariff_doc_to_response(doc.id, doc.to_dict() or {})
-        if not include_inactive and not tariff.is_active:
-            continue
-        if platform and not getattr(tariff.store_product_ids, platform, None):
-            continue
-        tariffs.append(tariff)
+# Rebuilt from the tariff mirror on every change: (platform, store product id) ->
+# tariff for IAP verification, and the serialized list responses with their ETags
+# keyed by (platform, include_inactive, paywall_only).
+_TARIFF_PRODUCT_INDEX: Dict[Tuple[str, str], TariffPlanResponse] = {}
+_TARIFF_CATALOG: Dict[Tuple[Optional[str], bool, bool], Tuple[TariffPlanListResponse, bytes, str]] = {}
+
+
+def _is_paywall_tariff(tariff: TariffPlanResponse) -> bool:
+    # Mobile paywall for VoxWallet currently supports subscription plans only.
+    return tariff.purchase_type == "subscription" and tariff.billing_period_unit != "lifetime"
+
+
+def _rebuild_tariff_indexes(docs: Dict[str, Dict[str, Any]]) -> None:
+    global _TARIFF_PRODUCT_INDEX, _TARIFF_CATALOG
+    tariffs = [_tariff_doc_to_response(doc_id, raw) for doc_id, raw in docs.items()]
     tariffs.sort(key=lambda item: (item.sort_order, 0 if item.is_featured else 1, item.id))
-    return tariffs
+
+    index: Dict[Tuple[str, str], TariffPlanResponse] = {}
+    for tariff in tariffs:
+        for platform in ("ios", "android"):
+            product_id = getattr(tariff.store_product_ids, platform, None)
+            if product_id:
+                index.setdefault((platform, product_id), tariff)
+
+    catalog: Dict[Tuple[Optional[str], bool, bool], Tuple[TariffPlanListResponse, bytes, str]] = {}
+    for platform in (None, "ios", "android"):
+        for include_inactive in (False, True):
+            selected = [
+                tariff
+                for tariff in tariffs
+                if (include_inactive or tariff.is_active)
+                and (platform is None or getattr(tariff.store_product_ids, platform, None))
+            ]
+            for paywall_only in (False, True):
+                items = [t for t in selected if _is_paywall_tariff(t)] if paywall_only else selected
+                response = TariffPlanListResponse(tariffs=items)
+                body = serialize_json(response)
+                catalog[(platform, include_inactive, paywall_only)] = (response, body, content_etag(body))
+
+    _TARIFF_PRODUCT_INDEX = index
+    _TARIFF_CATALOG = catalog
+
+
+tariff_plans_cache.subscribe(_rebuild_tariff_indexes)
+
+
+def _get_tariff_catalog(
+    platform: Optional[str],
+    *,
+    include_inactive: bool,
+    paywall_only: bool,
+) -> Tuple[TariffPlanListResponse, bytes, str]:
+    platform = _normalize_ads_platform(platform) if platform else None
+    key = (platform, include_inactive, paywall_only)
+    cached = _TARIFF_CATALOG.get(key)
+    if cached is None:
+        # The listener rebuild failed (cache listeners only log); retry it here.
+        try:
+            _rebuild_tariff_indexes(tariff_plans_cache.all())
+        except Exception as exc:
+            logger.warning("Tariff catalog rebuild failed: %s", exc)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Tariff catalog unavailable",
+            ) from exc
+        cached = _TARIFF_CATALOG[key]
+    return cached
 
 
 def _get_tariff_by_id(tariff_id: str, *, require_active: bool = False) -> TariffPlanResponse:
     normalized_id = _normalize_tariff_id(tariff_id)
-    db = get_firestore_client()
-    doc = db.collection("tariff_plans").document(normalized_id).get()
-    if not doc.exists:
+    raw = tariff_plans_cache.get(normalized_id)
+    if raw is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tariff not found")
-    tariff = _tariff_doc_to_response(doc.id, doc.to_dict() or {})
+    tariff = _tariff_doc_to_response(normalized_id, raw)
     if require_active and not tariff.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1302,6 +1624,7 @@ def _upsert_tariff(
         "updated_at": now_iso,
     }
     ref.set(to_store)
+    tariff_plans_cache.put(normalized_id, to_store)
     return _tariff_doc_to_response(normalized_id, to_store)
 
 
@@ -1348,6 +1671,7 @@ def _patch_tariff(
         "updated_at": now_iso,
     }
     db.collection("tariff_plans").document(normalized_id).set(to_store)
+    tariff_plans_cache.put(normalized_id, to_store)
     return _tariff_doc_to_response(normalized_id, to_store)
 
 
@@ -1355,10 +1679,8 @@ def _find_tariff_by_store_product_id(product_id: Optional[str], platform: str) -
     if not product_id:
         return None
     platform = _normalize_ads_platform(platform)
-    for tariff in _list_tariffs(include_inactive=True):
-        if getattr(tariff.store_product_ids, platform, None) == product_id:
-            return tariff
-    return None
+    tariff_plans_cache.ensure_loaded()
+    return _TARIFF_PRODUCT_INDEX.get((platform, product_id))
 
 
 def _seed_tariff_plans(settings: Settings) -> None:
@@ -1504,11 +1826,9 @@ def _default_ads_config(platform: str, settings: Settings) -> Dict[str, Any]:
 
 
 def _get_ads_config_doc(platform: str, settings: Settings) -> Dict[str, Any]:
-    db = get_firestore_client()
-    doc = db.collection("ads_config").document(platform).get()
-    if not doc.exists:
+    data = ads_config_cache.get(platform)
+    if data is None:
         return {"config": _default_ads_config(platform, settings), "updated_at": None}
-    data = doc.to_dict() or {}
     config = data.get("config") or {}
     if not isinstance(config, dict):
         config = {}
@@ -1533,9 +1853,11 @@ def _set_ads_config(
         existing = _get_ads_config(platform, get_settings())
         merged = {**existing, **_normalize_ads_config(config)}
         ref.set({"config": merged, "updated_at": now_iso}, merge=True)
+        ads_config_cache.put(platform, {"config": merged, "updated_at": now_iso})
         return {"config": merged, "updated_at": now_iso}
     normalized = _normalize_ads_config(config)
     ref.set({"config": normalized, "updated_at": now_iso})
+    ads_config_cache.put(platform, {"config": normalized, "updated_at": now_iso})
     return {"config": normalized, "updated_at": now_iso}
 
 
@@ -1550,76 +1872,89 @@ def _seed_ads_config(settings: Settings) -> None:
             doc_ref.set({"config": defaults, "updated_at": now_iso})
 
 
-_GOOGLE_PLAY_SCOPE = "https://www.googleapis.com/auth/androidpublisher"
+_IAP_RECONCILE_LOOKAHEAD = timedelta(hours=12)
+_IAP_RECONCILE_RETRY = timedelta(hours=1)
+_IAP_RECONCILE_GIVE_UP = timedelta(days=3)
+_IAP_RECONCILE_BATCH = 200
+_IAP_ACK_QUEUE = "iap_ack_queue"
+# Server-only: raw Google purchase tokens (needed to call Google again), keyed like
+# iap_purchases. Nothing else stores them, and no route returns them.
+_IAP_SECRETS = "iap_secrets"
+_IAP_ACK_BATCH = 100
+_IAP_ACK_BASE_DELAY_SECONDS = 30.0
+_IAP_ACK_MAX_DELAY_SECONDS = 6 * 3600.0
+# ~3 days of retries at the capped delay: Google refunds unacknowledged purchases then.
+_IAP_ACK_MAX_ATTEMPTS = 20
+_IAP_ACK_LEASE = timedelta(minutes=2)
 _APPLE_AUTH_ISSUER = "https://appleid.apple.com"
-_APPLE_AUTH_KEYS_URL = "https://appleid.apple.com/auth/keys"
 _APPLE_VERIFY_PROD_URL = "https://buy.itunes.apple.com/verifyReceipt"
 _APPLE_VERIFY_SANDBOX_URL = "https://sandbox.itunes.apple.com/verifyReceipt"
+_APPLE_VERIFY_URLS = {"production": _APPLE_VERIFY_PROD_URL, "sandbox": _APPLE_VERIFY_SANDBOX_URL}
+# verifyReceipt status telling us the receipt belongs to the other environment.
+_APPLE_WRONG_ENVIRONMENT_STATUS = {"production": 21007, "sandbox": 21008}
+_APPLE_RECEIPT_CACHE_TTL_SECONDS = 60.0
+_APPLE_ENVIRONMENT_TTL_SECONDS = 30 * 86400.0
+
+# Validated verifyReceipt responses by receipt hash, so client retries don't
+# repeat the round trip; never kept past the latest expiry in the receipt.
+_APPLE_RECEIPT_RESULTS: TTLCache[Dict[str, Any]] = TTLCache(
+    max_entries=2048, default_ttl=_APPLE_RECEIPT_CACHE_TTL_SECONDS
+)
+# Environment per original_transaction_id, plus the last one seen per uid (the
+# receipt is opaque until verified), so the next call hits the right endpoint first.
+_APPLE_ENVIRONMENTS: TTLCache[str] = TTLCache(
+    max_entries=50000, default_ttl=_APPLE_ENVIRONMENT_TTL_SECONDS
+)
+_APPLE_UID_TRANSACTIONS: TTLCache[str] = TTLCache(
+    max_entries=50000, default_ttl=_APPLE_ENVIRONMENT_TTL_SECONDS
+)
 
 
 def _token_hash(token: str) -> str:
     return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
-def _load_service_account_info(path_or_json: str) -> Dict[str, Any]:
-    try:
-        return json.loads(path_or_json)
-    except Exception:
-        with open(path_or_json, "r", encoding="utf-8") as fh:
-            return json.load(fh)
+def _store_iap_secret(platform: str, token: str) -> None:
+    get_firestore_client().collection(_IAP_SECRETS).document(
+        f"{platform}_{_token_hash(token)}"
+    ).set({"purchase_token": token, "updated_at": datetime.now(timezone.utc).isoformat()})
 
 
-@lru_cache(maxsize=1)
-def _google_play_credentials(path_or_json: str) -> service_account.Credentials:
-    info = _load_service_account_info(path_or_json)
-    return service_account.Credentials.from_service_account_info(
-        info, scopes=[_GOOGLE_PLAY_SCOPE]
-    )
+def _load_iap_secret(doc_id: str) -> Optional[str]:
+    snap = get_firestore_client().collection(_IAP_SECRETS).document(doc_id).get()
+    return (snap.to_dict() or {}).get("purchase_token") if snap.exists else None
 
 
-def _get_google_access_token(settings: Settings) -> str:
+def _google_play_client(settings: Settings) -> GooglePlayClient:
     if not settings.google_play_service_account_path:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="GOOGLE_PLAY_SERVICE_ACCOUNT_PATH is not configured",
         )
-    creds = _google_play_credentials(settings.google_play_service_account_path)
-    if not creds.valid:
-        creds.refresh(google_requests.Request())
-    if not creds.token:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Google Play access token unavailable",
-        )
-    return creds.token
+    return get_google_play_client(settings)
 
 
 def _google_play_get(settings: Settings, url: str) -> Dict[str, Any]:
-    token = _get_google_access_token(settings)
-    response = requests.get(
-        url,
-        headers={"Authorization": f"Bearer {token}"},
-        timeout=30,
-    )
-    if response.status_code >= 400:
-        logger.warning("Google Play API error %s: %s", response.status_code, response.text)
+    try:
+        return _google_play_client(settings).get(url)
+    except GooglePlayError as exc:
+        logger.warning("Google Play API error %s: %s", exc.status_code, exc)
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="Google Play verification failed",
-        )
-    return response.json()
+        ) from exc
 
 
-def _google_play_post(settings: Settings, url: str, payload: Optional[Dict[str, Any]] = None) -> None:
-    token = _get_google_access_token(settings)
-    response = requests.post(
-        url,
-        headers={"Authorization": f"Bearer {token}"},
-        json=payload or {},
-        timeout=30,
-    )
-    if response.status_code >= 400:
-        logger.warning("Google Play API error %s: %s", response.status_code, response.text)
+def _next_reconcile_after(expires_at: Optional[str]) -> Optional[str]:
+    # Re-check a subscription shortly before it lapses (renewals land around then),
+    # retry hourly while it is lapsed, and give up once it has been gone a while.
+    expires_dt = _parse_iso(expires_at)
+    if not expires_dt:
+        return None
+    now = datetime.now(timezone.utc)
+    if now - expires_dt > _IAP_RECONCILE_GIVE_UP:
+        return None
+    return max(expires_dt - _IAP_RECONCILE_LOOKAHEAD, now + _IAP_RECONCILE_RETRY).isoformat()
 
 
 def _record_iap_purchase(
@@ -1628,8 +1963,10 @@ def _record_iap_purchase(
     uid: str,
     *,
     product_id: Optional[str],
-    status: Optional[str],
+    purchase_status: Optional[str],
     expires_at: Optional[str],
+    reverify_token: Optional[str] = None,
+    original_transaction_id: Optional[str] = None,
 ) -> None:
     if not token:
         return
@@ -1646,19 +1983,27 @@ def _record_iap_purchase(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Purchase token already linked to another user",
             )
-    ref.set(
-        {
-            "platform": platform,
-            "token_hash": _token_hash(token),
-            "uid": uid,
-            "product_id": product_id,
-            "status": status,
-            "expires_at": expires_at,
-            "updated_at": now_iso,
-            "created_at": existing.get("created_at", now_iso) if snap.exists else now_iso,
-        },
-        merge=True,
-    )
+    to_store: Dict[str, Any] = {
+        "platform": platform,
+        "token_hash": _token_hash(token),
+        "uid": uid,
+        "product_id": product_id,
+        "status": purchase_status,
+        "expires_at": expires_at,
+        "updated_at": now_iso,
+        "created_at": existing.get("created_at", now_iso) if snap.exists else now_iso,
+    }
+    if existing.get("reverify_token"):
+        to_store["reverify_token"] = admin_firestore.DELETE_FIELD
+    if original_transaction_id:
+        to_store["original_transaction_id"] = original_transaction_id
+    if expires_at and (reverify_token or original_transaction_id):
+        # Google is re-checked with the token kept in iap_secrets, Apple with the
+        # original_transaction_id through the App Store Server API.
+        if reverify_token:
+            _store_iap_secret(platform, reverify_token)
+        to_store["reconcile_after"] = _next_reconcile_after(expires_at)
+    ref.set(to_store, merge=True)
 
 
 def _max_expiry_from_line_items(line_items: List[Dict[str, Any]]) -> Optional[str]:
@@ -1675,7 +2020,35 @@ def _max_expiry_from_line_items(line_items: List[Dict[str, Any]]) -> Optional[st
     return max(expiries).isoformat()
 
 
-def _apple_verify_receipt(settings: Settings, receipt_data: str) -> Dict[str, Any]:
+def _apple_receipt_items(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    receipt = data.get("receipt", {}) or {}
+    return data.get("latest_receipt_info") or receipt.get("in_app") or []
+
+
+def _apple_receipt_cache_expiry(data: Dict[str, Any]) -> float:
+    expires_at = time.time() + _APPLE_RECEIPT_CACHE_TTL_SECONDS
+    latest_ms = 0
+    for item in _apple_receipt_items(data):
+        try:
+            latest_ms = max(latest_ms, int(item.get("expires_date_ms") or 0))
+        except (TypeError, ValueError):
+            continue
+    if latest_ms and latest_ms / 1000 > time.time():
+        expires_at = min(expires_at, latest_ms / 1000)
+    return expires_at
+
+
+def _apple_post_verify_receipt(environment: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    response = requests.post(_APPLE_VERIFY_URLS[environment], json=payload, timeout=30)
+    return response.json()
+
+
+def _apple_verify_receipt(
+    settings: Settings,
+    receipt_data: str,
+    *,
+    uid: Optional[str] = None,
+) -> Dict[str, Any]:
     if not settings.apple_shared_secret:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1686,17 +2059,25 @@ def _apple_verify_receipt(settings: Settings, receipt_data: str) -> Dict[str, An
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="APPLE_BUNDLE_ID is not configured",
         )
+    receipt_key = _token_hash(receipt_data)
+    cached = _APPLE_RECEIPT_RESULTS.get(receipt_key)
+    if cached is not None:
+        return cached
+
     payload = {
         "receipt-data": receipt_data,
         "password": settings.apple_shared_secret,
         "exclude-old-transactions": True,
     }
-    response = requests.post(_APPLE_VERIFY_PROD_URL, json=payload, timeout=30)
-    data = response.json()
+    known_transaction = _APPLE_UID_TRANSACTIONS.get(uid) if uid else None
+    environment = (
+        _APPLE_ENVIRONMENTS.get(known_transaction) if known_transaction else None
+    ) or "production"
+    data = _apple_post_verify_receipt(environment, payload)
     status_code = data.get("status")
-    if status_code == 21007:
-        response = requests.post(_APPLE_VERIFY_SANDBOX_URL, json=payload, timeout=30)
-        data = response.json()
+    if status_code == _APPLE_WRONG_ENVIRONMENT_STATUS[environment]:
+        environment = "sandbox" if environment == "production" else "production"
+        data = _apple_post_verify_receipt(environment, payload)
         status_code = data.get("status")
     if status_code != 0:
         logger.warning("Apple verifyReceipt failed: %s", data)
@@ -1710,25 +2091,196 @@ def _apple_verify_receipt(settings: Settings, receipt_data: str) -> Dict[str, An
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid Apple receipt bundle ID",
         )
+
+    for item in _apple_receipt_items(data):
+        original_transaction_id = item.get("original_transaction_id")
+        if original_transaction_id:
+            _APPLE_ENVIRONMENTS.set(str(original_transaction_id), environment)
+            if uid:
+                _APPLE_UID_TRANSACTIONS.set(uid, str(original_transaction_id))
+    _APPLE_RECEIPT_RESULTS.set(receipt_key, data, expires_at=_apple_receipt_cache_expiry(data))
     return data
 
 
-def _google_ack_subscription(
-    settings: Settings, package_name: str, subscription_id: str, token: str
-) -> None:
-    url = (
+def _google_purchase_url(kind: str, package_name: str, product_id: str, token: str) -> str:
+    collection = "subscriptions" if kind == "subscription" else "products"
+    return (
         "https://androidpublisher.googleapis.com/androidpublisher/v3/applications/"
-        f"{package_name}/purchases/subscriptions/{subscription_id}/tokens/{token}:acknowledge"
+        f"{package_name}/purchases/{collection}/{product_id}/tokens/{token}"
     )
-    _google_play_post(settings, url)
 
 
-def _google_ack_product(settings: Settings, package_name: str, product_id: str, token: str) -> None:
-    url = (
-        "https://androidpublisher.googleapis.com/androidpublisher/v3/applications/"
-        f"{package_name}/purchases/products/{product_id}/tokens/{token}:acknowledge"
+def _ack_retry_delay(attempts: int) -> timedelta:
+    seconds = min(_IAP_ACK_MAX_DELAY_SECONDS, _IAP_ACK_BASE_DELAY_SECONDS * 2 ** max(0, attempts - 1))
+    return timedelta(seconds=random.uniform(seconds / 2, seconds))
+
+
+def _enqueue_google_ack(settings: Settings, kind: str, product_id: str, token: str) -> None:
+    # Acknowledgement is durable and off the request path; one queue doc per token.
+    db = get_firestore_client()
+    ref = db.collection(_IAP_ACK_QUEUE).document(_token_hash(token))
+    _store_iap_secret("google", token)
+
+    @admin_firestore.transactional
+    def create(transaction) -> bool:
+        snap = ref.get(transaction=transaction)
+        if snap.exists and (snap.to_dict() or {}).get("status") in {"pending", "in_flight", "done"}:
+            return False
+        now_iso = datetime.now(timezone.utc).isoformat()
+        transaction.set(
+            ref,
+            {
+                "kind": kind,
+                "package_name": settings.google_play_package_name,
+                "product_id": product_id,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now_iso,
+                "claim_id": None,
+                "last_error": None,
+                "created_at": now_iso,
+                "updated_at": now_iso,
+                "acknowledged_at": None,
+            },
+        )
+        return True
+
+    if create(db.transaction()):
+        _BACKGROUND_EXECUTOR.submit(_attempt_google_ack, settings, ref)
+
+
+def _claim_google_ack(ref) -> Optional[Tuple[Dict[str, Any], str]]:
+    # Whoever claims the doc (request thread or queue job, any worker) is the only
+    # one calling Google until it reports back or the lease runs out.
+    db = get_firestore_client()
+
+    @admin_firestore.transactional
+    def claim(transaction) -> Optional[Tuple[Dict[str, Any], str]]:
+        snap = ref.get(transaction=transaction)
+        item = (snap.to_dict() or {}) if snap.exists else {}
+        now = datetime.now(timezone.utc)
+        due = _parse_iso(item.get("next_attempt_at"))
+        if item.get("status") not in {"pending", "in_flight"} or not due or due > now:
+            return None
+        claim_id = secrets.token_hex(8)
+        transaction.set(
+            ref,
+            {
+                "status": "in_flight",
+                "claim_id": claim_id,
+                # A crashed attempt becomes due again once the lease is over.
+                "next_attempt_at": (now + _IAP_ACK_LEASE).isoformat(),
+                "updated_at": now.isoformat(),
+            },
+            merge=True,
+        )
+        return item, claim_id
+
+    return claim(db.transaction())
+
+
+def _finish_google_ack(ref, claim_id: str, fields: Dict[str, Any]) -> bool:
+    db = get_firestore_client()
+
+    @admin_firestore.transactional
+    def finish(transaction) -> bool:
+        snap = ref.get(transaction=transaction)
+        item = (snap.to_dict() or {}) if snap.exists else {}
+        if item.get("status") != "in_flight" or item.get("claim_id") != claim_id:
+            return False
+        transaction.set(ref, {**fields, "claim_id": None}, merge=True)
+        return True
+
+    return finish(db.transaction())
+
+
+def _google_purchase_acknowledged(settings: Settings, item: Dict[str, Any], token: str) -> bool:
+    url = _google_purchase_url(
+        str(item.get("kind")), str(item.get("package_name")), str(item.get("product_id")), token
+    )
+    try:
+        data = _google_play_client(settings).get(url)
+    except (GooglePlayError, HTTPException):
+        return False
+    return str(data.get("acknowledgementState")) == "1"
+
+
+def _attempt_google_ack(settings: Settings, ref) -> bool:
+    claimed = _claim_google_ack(ref)
+    if claimed is None:
+        return False
+    item, claim_id = claimed
+    now = datetime.now(timezone.utc)
+    attempts = int(item.get("attempts") or 0) + 1
+    token = None
+    try:
+        token = _load_iap_secret(f"google_{ref.id}") or item.get("purchase_token")
+        if not token:
+            raise GooglePlayError("Purchase token is not on file", status_code=404)
+        url = _google_purchase_url(
+            str(item.get("kind")),
+            str(item.get("package_name")),
+            str(item.get("product_id")),
+            str(token),
+        ) + ":acknowledge"
+        _google_play_client(settings).post(url)
+    except (GooglePlayError, HTTPException) as exc:
+        code = getattr(exc, "status_code", None)
+        permanent = code is not None and 400 <= code < 500 and code not in {401, 403, 408, 429}
+        # An earlier attempt may have gone through with its response lost.
+        if not (permanent and token and _google_purchase_acknowledged(settings, item, str(token))):
+            if permanent or attempts >= _IAP_ACK_MAX_ATTEMPTS:
+                logger.error("Google Play acknowledgement gave up for %s: %s", ref.id, exc)
+                next_attempt_at = None
+                next_status = "failed"
+            else:
+                logger.warning(
+                    "Google Play acknowledgement attempt %s failed for %s: %s", attempts, ref.id, exc
+                )
+                next_attempt_at = (now + _ack_retry_delay(attempts)).isoformat()
+                next_status = "pending"
+            _finish_google_ack(
+                ref,
+                claim_id,
+                {
+                    "status": next_status,
+                    "attempts": attempts,
+                    "next_attempt_at": next_attempt_at,
+                    "last_error": str(exc)[:500],
+                    "updated_at": now.isoformat(),
+                },
+            )
+            return False
+    return _finish_google_ack(
+        ref,
+        claim_id,
+        {
+            "status": "done",
+            "attempts": attempts,
+            "next_attempt_at": None,
+            "last_error": None,
+            "updated_at": now.isoformat(),
+            "acknowledged_at": now.isoformat(),
+            "purchase_token": admin_firestore.DELETE_FIELD,
+        },
+    )
+
+
+def _process_google_ack_queue(since: Optional[datetime]) -> None:
+    settings = get_settings()
+    db = get_firestore_client()
+    now_iso = datetime.now(timezone.utc).isoformat()
+    docs = list(
+        db.collection(_IAP_ACK_QUEUE)
+        .where("next_attempt_at", "<=", now_iso)
+        .limit(_IAP_ACK_BATCH)
+        .stream()
     )
-    _google_play_post(settings, url)
+    for doc in docs:
+        try:
+            _attempt_google_ack(settings, doc.reference)
+        except Exception as exc:
+            logger.warning("Google Play acknowledgement for %s crashed: %s", doc.id, exc)
 
 
 def _google_verify_subscription(
@@ -1758,7 +2310,7 @@ def _google_verify_subscription(
         and ack_state
         and str(ack_state).upper() == "ACKNOWLEDGEMENT_STATE_PENDING"
     ):
-        _google_ack_subscription(settings, settings.google_play_package_name, resolved_product_id, token)
+        _enqueue_google_ack(settings, "subscription", resolved_product_id, token)
     return data
 
 
@@ -1777,20 +2329,81 @@ def _google_verify_product(
     data = _google_play_get(settings, url)
     ack_state = data.get("acknowledgementState")
     if str(ack_state) in {"0", "ACKNOWLEDGEMENT_STATE_PENDING"}:
-        _google_ack_product(settings, settings.google_play_package_name, product_id, token)
+        _enqueue_google_ack(settings, "product", product_id, token)
     return data
 
 
+def _finish_login(
+    user: admin_auth.UserRecord,
+    provider: str,
+    *,
+    sync_error_detail: str,
+    token_error_detail: str,
+) -> str:
+    # Once the uid is known, profile ensure/normalization and token minting are
+    # independent; run them side by side instead of back to back.
+    profile_future = _REQUEST_EXECUTOR.submit(
+        _ensure_user_profile, user.uid, user.email, user.display_name
+    )
+    token_future = _REQUEST_EXECUTOR.submit(create_custom_token, user.uid, {"provider": provider})
+    try:
+        profile_future.result()
+    except Exception as exc:
+        logger.error("%s: %s", sync_error_detail, exc)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=sync_error_detail,
+        ) from exc
+    try:
+        custom = token_future.result()
+    except Exception as exc:
+        logger.error("%s: %s", token_error_detail, exc)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=token_error_detail,
+        ) from exc
+    logger.info("Custom token issued for %s uid=%s", provider, user.uid)
+    return custom
+
+
 @router.on_event("startup")
 def _startup():
     settings = get_settings()
     init_firebase(settings)
+    google_cert_store.warm()
+    apple_key_store.warm()
     _seed_plan_permissions(settings)
     _seed_tariff_plans(settings)
     _seed_ads_config(settings)
+    start_config_caches(settings.config_cache_poll_seconds)
+    start_periodic_job(
+        "subscription_expiry_sweeper",
+        settings.subscription_sweep_interval_seconds,
+        _sweep_subscription_expiries,
+    )
+    start_periodic_job(
+        "google_ack_queue",
+        settings.iap_ack_queue_interval_seconds,
+        _process_google_ack_queue,
+    )
+    start_periodic_job(
+        "iap_reconciler",
+        settings.iap_reconcile_interval_seconds,
+        _reconcile_iap_purchases,
+    )
+    start_periodic_job(
+        "overspending_sweep",
+        settings.overspending_sweep_interval_seconds,
+        _sweep_overspending,
+    )
     logger.info("Firebase initialized for project %s", settings.firebase_project_id)
 
 
+@router.on_event("shutdown")
+def _shutdown():
+    stop_all_jobs()
+
+
 @router.post("/auth/apple", response_model=TokenResponse)
 def apple_login(payload: AppleAuthRequest, settings: Settings = Depends(get_settings)):
     claims = verify_apple_identity_token(payload, settings)
@@ -1816,7 +2429,7 @@ def apple_login(payload: AppleAuthRequest, settings: Settings = Depends(get_sett
         if display_name and not user.display_name:
             update_fields["display_name"] = display_name
         if update_fields:
-            user = admin_auth.update_user(user.uid, **update_fields)
+            user = cache_user_record(admin_auth.update_user(user.uid, **update_fields))
         resolved_uid = user.uid
         logger.info(
             "Apple auth user ready requested_uid=%s resolved_uid=%s email=%s",
@@ -1824,7 +2437,6 @@ def apple_login(payload: AppleAuthRequest, settings: Settings = Depends(get_sett
             resolved_uid,
             user.email,
         )
-        _ensure_user_profile(user.uid, user.email, user.display_name)
     except Exception as exc:
         logger.error("Apple auth user sync failed: %s", exc)
         raise HTTPException(
@@ -1832,16 +2444,12 @@ def apple_login(payload: AppleAuthRequest, settings: Settings = Depends(get_sett
             detail="Apple auth user sync failed",
         ) from exc
 
-    try:
-        custom = create_custom_token(resolved_uid, {"provider": "apple"})
-        logger.info("Custom token issued for Apple uid=%s", resolved_uid)
-    except Exception as exc:
-        logger.error("Apple custom token creation failed: %s", exc)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Apple custom token creation failed",
-        ) from exc
-
+    custom = _finish_login(
+        user,
+        "apple",
+        sync_error_detail="Apple auth user sync failed",
+        token_error_detail="Apple custom token creation failed",
+    )
     return TokenResponse(firebase_custom_token=custom)
 
 
@@ -1864,18 +2472,16 @@ def google_login(payload: GooglePayload, settings: Settings = Depends(get_settin
             resolved_uid,
             user.email,
         )
-        _ensure_user_profile(user.uid, user.email, user.display_name)
     except Exception as exc:
         logger.error("Firebase user sync failed: %s", exc)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Firebase user sync failed") from exc
 
-    try:
-        custom = create_custom_token(resolved_uid, {"provider": "google"})
-        logger.info("Custom token issued for uid=%s", resolved_uid)
-    except Exception as exc:
-        logger.error("Custom token creation failed: %s", exc)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Custom token creation failed") from exc
-
+    custom = _finish_login(
+        user,
+        "google",
+        sync_error_detail="Firebase user sync failed",
+        token_error_detail="Custom token creation failed",
+    )
     return TokenResponse(firebase_custom_token=custom)
 
 
@@ -1939,8 +2545,7 @@ async def speech_to_text(
         return SttResponse(text=response.text, raw=response.text)
 
 
-@router.get("/fx/rates", response_model=FxRatesResponse)
-def fx_rates(settings: Settings = Depends(get_settings)):
+def _get_fx_rates(settings: Settings) -> Dict[str, Any]:
     try:
         return get_cbu_rates(settings)
     except requests.RequestException as exc:
@@ -1951,6 +2556,15 @@ def fx_rates(settings: Settings = Depends(get_settings)):
         ) from exc
 
 
+@router.get("/fx/rates", response_model=FxRatesResponse)
+def fx_rates(request: Request, settings: Settings = Depends(get_settings)):
+    payload = _get_fx_rates(settings)
+    etag = version_etag("fx", payload.get("date"), payload.get("updated_at"))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return etag_json_response(request, FxRatesResponse(**payload), etag=etag)
+
+
 @router.post("/voice/parse", response_model=VoiceAnalyzeResponse)
 def voice_parse(
     payload: VoiceAnalyzeRequest,
@@ -1975,27 +2589,18 @@ def voice_parse(
     return VoiceAnalyzeResponse(**result)
 
 
-@router.post("/voice/commit")
-def voice_commit(
+def _build_voice_transaction(
+    uid: str,
+    wallets_ref,
     payload: VoiceCommitRequest,
-    user: Dict[str, Any] = Depends(require_firebase_user),
-):
-    db = get_firestore_client()
-    uid = str(user.get("uid"))
-    wallet_id = payload.wallet_id
-    wallet_ref = (
-        db.collection("users")
-        .document(uid)
-        .collection("wallets")
-        .document(wallet_id)
-    )
-    wallet_snapshot = wallet_ref.get()
-    if not wallet_snapshot.exists:
+) -> Tuple[Any, Any, Dict[str, Any]]:
+    wallet_id = (payload.wallet_id or "").strip()
+    if not wallet_id or "/" in wallet_id:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Wallet not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid wallet id",
         )
-
+    wallet_ref = wallets_ref.document(wallet_id)
     amount = _to_float(payload.balance, default=-1.0)
     if amount <= 0:
         raise HTTPException(
@@ -2009,17 +2614,14 @@ def voice_commit(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid transaction type",
         )
-    if tx_type == "expensese":
-        existing_transactions = _collect_collection(wallet_ref.collection("transactions"))
-        available_balance = _wallet_net_balance(wallet_snapshot.to_dict() or {}, existing_transactions)
-        if amount > available_balance + 1e-9:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Expense amount exceeds wallet balance",
-            )
-
+    client_id = (payload.client_id or "").strip()
+    if payload.client_id is not None and (not client_id or "/" in client_id or len(client_id) > 128):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid client id",
+        )
     tx_ref = (
-        wallet_ref.collection("transactions").document()
+        wallet_ref.collection("transactions").document(client_id or None)
     )
     category_payload = payload.category or {}
     category_id = payload.category_id or category_payload.get("id") or ""
@@ -2044,31 +2646,491 @@ def voice_commit(
         "note": note_payload,
         "category": category_payload,
     }
-    tx_ref.set(tx_doc)
-    return tx_doc
+    return wallet_ref, tx_ref, tx_doc
+
+
+def _exceeds_balance(tx_doc: Dict[str, Any], balance: float) -> bool:
+    return tx_doc["type"] == "expensese" and tx_doc["balance"] > balance + 1e-9
+
+
+_VOICE_ALREADY_COMMITTED = "Already committed"
+
+
+def _commit_voice_transactions(
+    db,
+    user_ref,
+    wallet_ref,
+    entries: List[Tuple[int, Any, Dict[str, Any]]],
+) -> List[VoiceCommitBatchItemResult]:
+    """Apply `entries` (index, tx_ref, tx_doc) of one wallet in request order, in one
+    transaction: the balance check, the inserts, the totals and the rollups commit
+    together, so concurrent commits to the wallet can't both pass against the same
+    balance. Entries whose doc already exists (a retried client_id) are reported as
+    committed without being written again."""
+
+    @admin_firestore.transactional
+    def commit(transaction) -> List[VoiceCommitBatchItemResult]:
+        wallet_snapshot = wallet_ref.get(transaction=transaction)
+        if not wallet_snapshot.exists:
+            return [
+                VoiceCommitBatchItemResult(
+                    index=index, status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found"
+                )
+                for index, _tx_ref, _tx_doc in entries
+            ]
+        existing = {
+            snapshot.id: snapshot
+            for snapshot in transaction.get_all([tx_ref for _index, tx_ref, _tx_doc in entries])
+        }
+        wallet = wallet_snapshot.to_dict() or {}
+        transactions_total, transaction_count = wallet_totals_in_transaction(
+            transaction, wallet_ref, wallet
+        )
+        balance = available_balance(wallet, transactions_total)
+        results: List[VoiceCommitBatchItemResult] = []
+        written: List[Dict[str, Any]] = []
+        for index, tx_ref, tx_doc in entries:
+            stored = existing.get(tx_ref.id)
+            if stored is not None and stored.exists:
+                results.append(
+                    VoiceCommitBatchItemResult(
+                        index=index,
+                        status_code=status.HTTP_200_OK,
+                        transaction=stored.to_dict() or {},
+                        detail=_VOICE_ALREADY_COMMITTED,
+                    )
+                )
+                continue
+            if _exceeds_balance(tx_doc, balance):
+                results.append(
+                    VoiceCommitBatchItemResult(
+                        index=index,
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Expense amount exceeds wallet balance",
+                    )
+                )
+                continue
+            balance += transaction_delta(tx_doc)
+            transactions_total += transaction_delta(tx_doc)
+            transaction_count += 1
+            transaction.create(tx_ref, tx_doc)
+            written.append(tx_doc)
+            results.append(
+                VoiceCommitBatchItemResult(
+                    index=index, status_code=status.HTTP_200_OK, transaction=tx_doc
+                )
+            )
+        if written:
+            transaction.set(
+                wallet_ref,
+                totals_fields(transactions_total, transaction_count),
+                merge=True,
+            )
+            write_rollup_increments(transaction, user_ref, written)
+        return results
 
+    return commit(db.transaction())
 
-@router.get("/me", response_model=UserProfileResponse)
-def get_me(user: Dict[str, Any] = Depends(require_firebase_user)):
+
+@router.post("/voice/commit")
+def voice_commit(
+    payload: VoiceCommitRequest,
+    user: Dict[str, Any] = Depends(require_firebase_user),
+):
+    db = get_firestore_client()
     uid = str(user.get("uid"))
-    auth_user = admin_auth.get_user(uid)
-    profile_data = _ensure_user_profile(uid, auth_user.email, auth_user.display_name)
-    return _normalize_profile(uid, profile_data)
+    user_ref = db.collection("users").document(uid)
+    wallet_ref, tx_ref, tx_doc = _build_voice_transaction(
+        uid, user_ref.collection("wallets"), payload
+    )
 
+    outcome = _commit_voice_transactions(db, user_ref, wallet_ref, [(0, tx_ref, tx_doc)])[0]
+    if outcome.status_code != status.HTTP_200_OK:
+        raise HTTPException(status_code=outcome.status_code, detail=outcome.detail)
+    if outcome.detail is None and tx_doc["type"] == "expensese":
+        _BACKGROUND_EXECUTOR.submit(_evaluate_overspending_after_commit, uid)
+    return outcome.transaction
 
-@router.get("/me/permissions", response_model=UserPermissionsResponse)
-def get_my_permissions(user: Dict[str, Any] = Depends(require_firebase_user)):
+
+@router.post("/voice/commit/batch", response_model=VoiceCommitBatchResponse)
+def voice_commit_batch(
+    payload: VoiceCommitBatchRequest,
+    user: Dict[str, Any] = Depends(require_firebase_user),
+):
+    # Sync path for queued offline entries: each wallet's items are applied in
+    # request order in one transaction against its running balance. Rejected items
+    # don't fail the rest of the request; items carrying a client_id can be resent.
+    if not payload.items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No items",
+        )
+    if len(payload.items) > _VOICE_COMMIT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {_VOICE_COMMIT_BATCH_MAX_ITEMS} items per batch",
+        )
+    db = get_firestore_client()
     uid = str(user.get("uid"))
-    auth_user = admin_auth.get_user(uid)
-    profile_data = _ensure_user_profile(uid, auth_user.email, auth_user.display_name)
-    profile = _normalize_profile(uid, profile_data)
-    effective_plan = _normalize_account_plan_name(profile.access_plan, default="free")
-    permissions = _get_plan_permissions(effective_plan)
-    return UserPermissionsResponse(plan=effective_plan, permissions=permissions)
+    user_ref = db.collection("users").document(uid)
+    wallets_ref = user_ref.collection("wallets")
+
+    results: List[Optional[VoiceCommitBatchItemResult]] = [None] * len(payload.items)
+
+    def reject(index: int, status_code: int, detail: str) -> None:
+        results[index] = VoiceCommitBatchItemResult(
+            index=index, status_code=status_code, detail=detail
+        )
+
+    by_wallet: Dict[str, List[Tuple[int, Any, Dict[str, Any]]]] = {}
+    wallet_refs: Dict[str, Any] = {}
+    seen_paths: set = set()
+    for index, item in enumerate(payload.items):
+        try:
+            wallet_ref, tx_ref, tx_doc = _build_voice_transaction(uid, wallets_ref, item)
+        except HTTPException as exc:
+            reject(index, exc.status_code, str(exc.detail))
+            continue
+        if tx_ref.path in seen_paths:
+            reject(index, status.HTTP_409_CONFLICT, "Duplicate client id in batch")
+            continue
+        seen_paths.add(tx_ref.path)
+        wallet_refs[wallet_ref.id] = wallet_ref
+        by_wallet.setdefault(wallet_ref.id, []).append((index, tx_ref, tx_doc))
+
+    def commit_chunk(wallet_id: str, chunk: List[Tuple[int, Any, Dict[str, Any]]]) -> None:
+        try:
+            outcomes = _commit_voice_transactions(db, user_ref, wallet_refs[wallet_id], chunk)
+        except Exception as exc:
+            logger.warning("Voice commit batch write failed for uid=%s: %s", uid, exc)
+            for index, _tx_ref, _tx_doc in chunk:
+                reject(index, status.HTTP_503_SERVICE_UNAVAILABLE, "Commit failed, retry")
+            return
+        for outcome in outcomes:
+            results[outcome.index] = outcome
+
+    # One transaction per wallet (split only to stay under the per-commit write
+    # limit): one write per transaction, plus the wallet totals and one rollup
+    # write per month.
+    for wallet_id, entries in by_wallet.items():
+        chunk: List[Tuple[int, Any, Dict[str, Any]]] = []
+        chunk_months: set = set()
+        for entry in entries:
+            month = rollup_month(entry[2])
+            needed = 1 + (0 if month is None or month in chunk_months else 1)
+            if chunk and len(chunk) + 1 + len(chunk_months) + needed > _FIRESTORE_BATCH_LIMIT:
+                commit_chunk(wallet_id, chunk)
+                chunk = []
+                chunk_months = set()
+            chunk.append(entry)
+            if month is not None:
+                chunk_months.add(month)
+        commit_chunk(wallet_id, chunk)
+
+    final = [result for result in results if result is not None]
+    committed = sum(1 for result in final if result.status_code == status.HTTP_200_OK)
+    if any(
+        result.status_code == status.HTTP_200_OK
+        and result.detail is None
+        and (result.transaction or {}).get("type") == "expensese"
+        for result in final
+    ):
+        _BACKGROUND_EXECUTOR.submit(_evaluate_overspending_after_commit, uid)
+    return VoiceCommitBatchResponse(
+        results=final,
+        committed=committed,
+        failed=len(final) - committed,
+    )
+
+
+@router.get("/me", response_model=UserProfileResponse)
+def get_me(request: Request, ctx: UserContext = Depends(require_user_context)):
+    return etag_json_response(request, ctx.profile)
+
+
+@router.get("/me/permissions", response_model=UserPermissionsResponse)
+def get_my_permissions(request: Request, ctx: UserContext = Depends(require_user_context)):
+    return etag_json_response(
+        request,
+        UserPermissionsResponse(plan=ctx.access_plan, permissions=ctx.permissions),
+    )
+
+
+def _parse_stats_date(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.strip()[:10])
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {name} date",
+        ) from exc
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _stats_range(granularity: str, start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    end = end or datetime.now(timezone.utc).date()
+    if start is None:
+        start = {
+            "day": end - timedelta(days=29),
+            "week": end - timedelta(weeks=11),
+            "month": _add_months(end, -11),
+        }[granularity]
+    # Snap to whole buckets so the first and last points aren't partial.
+    if granularity == "week":
+        start -= timedelta(days=start.weekday())
+        end += timedelta(days=6 - end.weekday())
+    elif granularity == "month":
+        start = start.replace(day=1)
+        end = _add_months(end, 1) - timedelta(days=1)
+    return start, end
+
+
+def _stats_bucket_offsets(granularity: str, start: date, end: date) -> List[int]:
+    total_days = (end - start).days + 1
+    if granularity == "day":
+        return list(range(total_days))
+    if granularity == "week":
+        return list(range(0, total_days, 7))
+    offsets = []
+    cursor = start
+    while cursor <= end:
+        offsets.append((cursor - start).days)
+        cursor = _add_months(cursor, 1)
+    return offsets
+
+
+@router.get("/me/stats", response_model=UserStatsResponse)
+def get_my_stats(
+    request: Request,
+    granularity: str = "month",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    wallet_id: Optional[str] = None,
+    currency: Optional[str] = None,
+    ctx: UserContext = Depends(require_user_context),
+    settings: Settings = Depends(get_settings),
+):
+    # Income/expense series and category totals from the monthly rollups: one read
+    # per month in range plus the wallet list, instead of every transaction.
+    granularity = (granularity or "").strip().lower()
+    if granularity not in _STATS_GRANULARITIES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid granularity")
+    range_start, range_end = _stats_range(
+        granularity, _parse_stats_date(start, "start"), _parse_stats_date(end, "end")
+    )
+    if range_start > range_end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start is after end")
+    months: List[str] = []
+    cursor = range_start.replace(day=1)
+    while cursor <= range_end:
+        months.append(f"{cursor.year:04d}-{cursor.month:02d}")
+        cursor = _add_months(cursor, 1)
+    if len(months) > _STATS_MAX_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range spans more than {_STATS_MAX_MONTHS} months",
+        )
+
+    db = get_firestore_client()
+    user_ref = db.collection("users").document(ctx.uid)
+    # Cells of deleted wallets stay in the rollups; only existing wallets count.
+    currencies = wallet_currencies(
+        user_ref, (ctx.profile.baseCurrency or DEFAULT_BASE_CURRENCY).strip().upper()
+    )
+    if wallet_id:
+        currencies = {key: value for key, value in currencies.items() if key == wallet_id}
+    rollups = load_rollups(db, user_ref, months)
+
+    target = (currency or ctx.profile.currency or DEFAULT_CURRENCY).strip().upper()
+    fx: Dict[str, Any] = {}
+    factors: Dict[str, Optional[float]] = {}
+
+    def factor(code: str) -> Optional[float]:
+        if code == target:
+            return 1.0
+        if code not in factors:
+            if not fx:
+                fx.update(_get_fx_rates(settings))
+            factors[code] = conversion_factor(code, target, fx.get("rates") or {})
+        return factors[code]
+
+    total_days = (range_end - range_start).days + 1
+    income = [0.0] * total_days
+    expense = [0.0] * total_days
+    categories: Dict[str, List[float]] = {}
+    category_meta: Dict[str, Dict[str, Any]] = {}
+    for rollup in rollups:
+        month_start = date.fromisoformat(f"{rollup.get('month')}-01")
+        base = (month_start - range_start).days
+        for code, day, cell in iter_cells(rollup, "days", currencies):
+            offset = base + int(day) - 1
+            rate = factor(code) if 0 <= offset < total_days else None
+            if rate is not None:
+                income[offset] += _to_float(cell.get("income")) * rate
+                expense[offset] += _to_float(cell.get("expense")) * rate
+        # Category cells are per month, so they cover the whole months in range.
+        for code, category_id, cell in iter_cells(rollup, "categories", currencies):
+            rate = factor(code)
+            if rate is None:
+                continue
+            totals = categories.setdefault(category_id, [0.0, 0.0])
+            totals[0] += _to_float(cell.get("income")) * rate
+            totals[1] += _to_float(cell.get("expense")) * rate
+        for category_id, meta in (rollup.get("category_meta") or {}).items():
+            category_meta.setdefault(category_id, {}).update(meta or {})
+
+    offsets = _stats_bucket_offsets(granularity, range_start, range_end)
+    bounds = offsets[1:] + [total_days]
+    series = [
+        UserStatsPoint(
+            start=(range_start + timedelta(days=lo)).isoformat(),
+            income=round(sum(income[lo:hi]), 2),
+            expense=round(sum(expense[lo:hi]), 2),
+        )
+        for lo, hi in zip(offsets, bounds)
+    ]
+    category_items = [
+        UserStatsCategory(
+            category_id=category_id,
+            name=(category_meta.get(category_id) or {}).get("name"),
+            icon=(category_meta.get(category_id) or {}).get("icon"),
+            income=round(totals[0], 2),
+            expense=round(totals[1], 2),
+        )
+        for category_id, totals in categories.items()
+    ]
+    category_items.sort(key=lambda item: (-item.expense, -item.income, item.category_id))
+    return etag_json_response(
+        request,
+        UserStatsResponse(
+            currency=target,
+            granularity=granularity,
+            start=range_start.isoformat(),
+            end=range_end.isoformat(),
+            income=round(sum(income), 2),
+            expense=round(sum(expense), 2),
+            series=series,
+            categories=category_items,
+            categories_months=months,
+            rates_date=fx.get("date"),
+            unconverted_currencies=sorted(code for code, rate in factors.items() if rate is None),
+        ),
+    )
+
+
+@router.get("/me/net-worth", response_model=NetWorthResponse)
+def get_my_net_worth(
+    request: Request,
+    ctx: UserContext = Depends(require_user_context),
+    settings: Settings = Depends(get_settings),
+):
+    # Wallet balances (opening balance + materialized totals) summed per currency,
+    # then converted as one vector at today's and at the previous day's CBU rates.
+    base = (ctx.profile.baseCurrency or DEFAULT_BASE_CURRENCY).strip().upper()
+    db = get_firestore_client()
+    balances: Dict[str, List[float]] = {}
+    for wallet_doc in db.collection("users").document(ctx.uid).collection("wallets").stream():
+        wallet = wallet_doc.to_dict() or {}
+        transactions_total, _count = read_wallet_totals(wallet_doc.reference, wallet)
+        code = str(wallet.get("currency") or base).strip().upper()
+        entry = balances.setdefault(code, [0.0, 0])
+        entry[0] += available_balance(wallet, transactions_total)
+        entry[1] += 1
+
+    codes = sorted(balances)
+    amounts = [balances[code][0] for code in codes]
+    fx: Dict[str, Any] = {}
+    if any(code != base for code in codes):
+        fx = _get_fx_rates(settings)
+    converted, unconverted = convert_amounts(amounts, codes, base, fx.get("rates") or {})
+    # Without a previous rate for a currency, its change is 0 rather than a guess.
+    previous, _ = convert_amounts(amounts, codes, base, fx.get("previous_rates") or {})
+    currencies: List[NetWorthCurrency] = []
+    total = 0.0
+    change = 0.0
+    for code, amount, today, yesterday in zip(codes, amounts, converted, previous):
+        day_change = None
+        if today is not None:
+            day_change = today - (today if yesterday is None else yesterday)
+            total += today
+            change += day_change
+        currencies.append(
+            NetWorthCurrency(
+                currency=code,
+                wallet_count=int(balances[code][1]),
+                balance=round(amount, 2),
+                converted=None if today is None else round(today, 2),
+                change=None if day_change is None else round(day_change, 2),
+            )
+        )
+    return etag_json_response(
+        request,
+        NetWorthResponse(
+            currency=base,
+            total=round(total, 2),
+            change=round(change, 2),
+            currencies=currencies,
+            rates_date=fx.get("date"),
+            previous_date=fx.get("previous_date"),
+            unconverted=unconverted,
+        ),
+    )
+
+
+@router.get("/bootstrap", response_model=BootstrapResponse)
+def get_bootstrap(
+    platform: str,
+    request: Request,
+    ctx: UserContext = Depends(require_user_context),
+    settings: Settings = Depends(get_settings),
+):
+    # Everything the app loads at launch, behind one auth/profile resolution. A
+    # failing section is reported in `errors` instead of failing the request.
+    platform = _normalize_ads_platform(platform)
+    sections: Dict[str, Callable[[], Any]] = {
+        "ads_config": lambda: _ads_config_response(
+            platform, _get_ads_config_doc(platform, settings), ctx.access_plan == "free"
+        ),
+        "tariffs": lambda: _get_tariff_catalog(
+            platform, include_inactive=False, paywall_only=True
+        )[0],
+        "fx_rates": lambda: FxRatesResponse(**_get_fx_rates(settings)),
+        "notifications": lambda: NotificationUnreadCountResponse(
+            unread_count=get_unread_notification_count(ctx.uid)
+        ),
+    }
+    futures = {name: _REQUEST_EXECUTOR.submit(fn) for name, fn in sections.items()}
+    results: Dict[str, Any] = {}
+    errors: Dict[str, BootstrapSectionError] = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except HTTPException as exc:
+            errors[name] = BootstrapSectionError(status_code=exc.status_code, detail=str(exc.detail))
+        except Exception as exc:
+            logger.exception("Bootstrap section %s failed for uid=%s: %s", name, ctx.uid, exc)
+            errors[name] = BootstrapSectionError(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Internal error",
+            )
+    response = BootstrapResponse(
+        profile=ctx.profile,
+        permissions=UserPermissionsResponse(plan=ctx.access_plan, permissions=ctx.permissions),
+        errors=errors,
+        **results,
+    )
+    return etag_json_response(request, response)
 
 
 @router.get("/tariffs", response_model=TariffPlanListResponse)
 def get_tariffs(
+    request: Request,
     platform: Optional[str] = None,
     include_inactive: bool = False,
     user: Dict[str, Any] = Depends(require_firebase_user),
@@ -2077,28 +3139,17 @@ def get_tariffs(
     allow_inactive = include_inactive and (
         bool(user.get("admin") is True) or str(user.get("uid")) in settings.admin_uid_set
     )
-    tariffs = _list_tariffs(
-        include_inactive=allow_inactive,
-        platform=platform,
-    )
-    # Mobile paywall for VoxWallet currently supports subscription plans only.
-    tariffs = [
-        item
-        for item in tariffs
-        if item.purchase_type == "subscription" and item.billing_period_unit != "lifetime"
-    ]
-    return TariffPlanListResponse(tariffs=tariffs)
+    _, body, etag = _get_tariff_catalog(platform, include_inactive=allow_inactive, paywall_only=True)
+    return etag_json_response(request, None, etag=etag, body=body)
 
 
 @router.post("/me/trial/start", response_model=TrialStartResponse)
 def start_my_trial(
     payload: TrialStartRequest,
-    user: Dict[str, Any] = Depends(require_firebase_user),
+    ctx: UserContext = Depends(require_user_context),
 ):
-    uid = str(user.get("uid"))
-    auth_user = admin_auth.get_user(uid)
-    profile_data = _ensure_user_profile(uid, auth_user.email, auth_user.display_name)
-    profile = _normalize_profile(uid, profile_data)
+    uid = ctx.uid
+    profile = ctx.profile
     tariff = _get_tariff_by_id(payload.tariff_id, require_active=True)
     if tariff.trial_days <= 0:
         raise HTTPException(
@@ -2123,9 +3174,15 @@ def start_my_trial(
 
     now = datetime.now(timezone.utc)
     trial_ends_at = (now + timedelta(days=tariff.trial_days)).isoformat()
-    _update_user_profile(
-        uid,
-        {
+
+    def mutate(existing_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Re-checked inside the transaction so two concurrent starts can't both win.
+        if existing_data.get("trial_consumed"):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Trial already used",
+            )
+        return {
             "trial_status": "active",
             "trial_started_at": now.isoformat(),
             "trial_ends_at": trial_ends_at,
@@ -2133,20 +3190,9 @@ def start_my_trial(
             "trial_access_plan": tariff.access_plan,
             "trial_consumed": True,
             "pending_tariff_id": tariff.id,
-        },
-    )
-    refreshed = _normalize_profile(
-        uid,
-        _ensure_user_profile(uid, auth_user.email, auth_user.display_name),
-    )
-    _update_custom_claims(
-        uid,
-        {
-            "plan": refreshed.plan,
-            "is_premium": refreshed.is_premium,
-            "access_plan": refreshed.access_plan,
-        },
-    )
+        }
+
+    refreshed = _normalize_profile(uid, _apply_profile_state(uid, mutate))
     return TrialStartResponse(profile=refreshed, tariff=tariff)
 
 
@@ -2186,13 +3232,55 @@ def mark_my_notifications_read_all(user: Dict[str, Any] = Depends(require_fireba
     return mark_all_notifications_read(uid)
 
 
+def _evaluate_overspending_after_commit(uid: str) -> None:
+    # Repeat checks on the same day are cheap: the notification's per-day dedupe key
+    # keeps them from raising a second warning, on any worker.
+    try:
+        evaluate_overspending(uid, get_settings())
+    except Exception as exc:
+        logger.warning("Overspending check failed for uid=%s: %s", uid, exc)
+
+
+def _sweep_overspending(since: Optional[datetime]) -> None:
+    uids = sorted(users_with_plan_budgets(get_firestore_client()))
+    if not uids:
+        return
+    settings = get_settings()
+
+    def run(uid: str) -> bool:
+        try:
+            result = evaluate_overspending(uid, settings)
+        except Exception as exc:
+            logger.warning("Overspending sweep failed for uid=%s: %s", uid, exc)
+            return False
+        return result.triggered
+
+    with ThreadPoolExecutor(
+        max_workers=_OVERSPENDING_SWEEP_CONCURRENCY,
+        thread_name_prefix="overspending",
+    ) as pool:
+        results = list(pool.map(run, uids))
+    logger.info("Overspending sweep: %s/%s users warned", sum(results), len(results))
+
+
 @router.post("/me/notifications/overspending", response_model=OverspendingNotificationResponse)
 def create_my_overspending_notification(
     payload: OverspendingNotificationRequest,
     user: Dict[str, Any] = Depends(require_firebase_user),
+    settings: Settings = Depends(get_settings),
 ):
+    # The client's actual/expected figures are only a hint that it's worth checking;
+    # spending and pace are recomputed from planBudgets and the rollups.
     uid = str(user.get("uid"))
-    return create_overspending_notification(uid, payload)
+    try:
+        result = evaluate_overspending(uid, settings, language=payload.language)
+    except requests.RequestException as exc:
+        logger.error("CBU FX request failed: %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="FX rate service unavailable",
+        ) from exc
+    return result
 
 
 @router.post("/me/notifications/{notification_id}/read", response_model=NotificationMarkReadResponse)
@@ -2220,20 +3308,13 @@ def get_my_notifications(
     )
 
 
-@router.get("/ads/config/{platform}", response_model=AdsConfigResponse)
-def get_ads_config(
+def _ads_config_response(
     platform: str,
-    user: Dict[str, Any] = Depends(require_firebase_user),
-    settings: Settings = Depends(get_settings),
-):
-    platform = _normalize_ads_platform(platform)
-    uid = str(user.get("uid"))
-    auth_user = admin_auth.get_user(uid)
-    profile_data = _ensure_user_profile(uid, auth_user.email, auth_user.display_name)
-    profile = _normalize_profile(uid, profile_data)
-    config_doc = _get_ads_config_doc(platform, settings)
+    config_doc: Dict[str, Any],
+    ads_allowed: bool,
+) -> AdsConfigResponse:
     config = config_doc["config"]
-    if profile.access_plan != "free":
+    if not ads_allowed:
         config = {**config, "enabled": False}
     return AdsConfigResponse(
         platform=platform,
@@ -2242,50 +3323,62 @@ def get_ads_config(
     )
 
 
+@router.get("/ads/config/{platform}", response_model=AdsConfigResponse)
+def get_ads_config(
+    platform: str,
+    request: Request,
+    ctx: UserContext = Depends(require_user_context),
+    settings: Settings = Depends(get_settings),
+):
+    platform = _normalize_ads_platform(platform)
+    ads_allowed = ctx.access_plan == "free"
+    config_doc = _get_ads_config_doc(platform, settings)
+    etag = version_etag("ads_config", platform, config_doc["updated_at"] or "", ads_allowed)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response = _ads_config_response(platform, config_doc, ads_allowed)
+    return etag_json_response(request, response, etag=etag)
+
+
 @router.post("/iap/google/verify", response_model=IapVerifyResponse)
 def verify_google_iap(
     payload: GoogleIapVerifyRequest,
-    user: Dict[str, Any] = Depends(require_firebase_user),
+    ctx: UserContext = Depends(require_user_context),
     settings: Settings = Depends(get_settings),
 ):
     if not payload.purchase_token:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing purchase token")
-    uid = str(user.get("uid"))
+    uid = ctx.uid
+
+    if not payload.force:
+        fast = _google_fast_path(ctx, payload, settings.iap_fast_path_seconds)
+        if fast is not None:
+            return fast
 
     is_subscription = payload.is_subscription or (
         payload.product_id in settings.google_play_subscription_id_set
     )
     if is_subscription:
         data = _google_verify_subscription(settings, payload.purchase_token, payload.product_id)
-        line_items = data.get("lineItems", [])
-        premium_until = _max_expiry_from_line_items(line_items)
-        premium_status = data.get("subscriptionState")
-        plan = "premium" if _compute_is_premium("premium", premium_until, premium_status) else "free"
-        resolved_product_id = payload.product_id
-        if not resolved_product_id and line_items:
-            resolved_product_id = line_items[0].get("productId")
+        plan, resolved_product_id, premium_until, premium_status = _google_subscription_entitlement(
+            data, payload.product_id
+        )
         _record_iap_purchase(
             "google",
             payload.purchase_token,
             uid,
             product_id=resolved_product_id,
-            status=premium_status,
+            purchase_status=premium_status,
             expires_at=premium_until,
+            reverify_token=payload.purchase_token,
         )
-        matched_tariff = _find_tariff_by_store_product_id(resolved_product_id, "android")
-        _set_user_plan(
+        return _apply_google_purchase(
             uid,
             plan=plan,
-            source="iap:google",
+            product_id=resolved_product_id,
             premium_until=premium_until,
             premium_status=premium_status,
-            tariff_id=matched_tariff.id if matched_tariff else None,
         )
-        auth_user = admin_auth.get_user(uid)
-        profile = _normalize_profile(
-            uid, _ensure_user_profile(uid, auth_user.email, auth_user.display_name)
-        )
-        return IapVerifyResponse(profile=profile, platform="google", product_id=resolved_product_id)
 
     data = _google_verify_product(settings, payload.purchase_token, payload.product_id)
     purchase_state = data.get("purchaseState")
@@ -2296,50 +3389,125 @@ def verify_google_iap(
         payload.purchase_token,
         uid,
         product_id=payload.product_id,
-        status=premium_status,
+        purchase_status=premium_status,
         expires_at=None,
     )
-    matched_tariff = _find_tariff_by_store_product_id(payload.product_id, "android")
-    _set_user_plan(
+    return _apply_google_purchase(
         uid,
         plan=plan,
-        source="iap:google",
+        product_id=payload.product_id,
         premium_until=None,
         premium_status=premium_status,
+    )
+
+
+def _google_subscription_entitlement(
+    data: Dict[str, Any],
+    product_id: Optional[str],
+) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
+    line_items = data.get("lineItems", [])
+    premium_until = _max_expiry_from_line_items(line_items)
+    premium_status = data.get("subscriptionState")
+    plan = "premium" if _compute_is_premium("premium", premium_until, premium_status) else "free"
+    resolved_product_id = product_id
+    if not resolved_product_id and line_items:
+        resolved_product_id = line_items[0].get("productId")
+    return plan, resolved_product_id, premium_until, premium_status
+
+
+def _apply_google_purchase(
+    uid: str,
+    *,
+    plan: str,
+    product_id: Optional[str],
+    premium_until: Optional[str],
+    premium_status: Optional[str],
+) -> IapVerifyResponse:
+    matched_tariff = _find_tariff_by_store_product_id(product_id, "android")
+    final_data = _set_user_plan(
+        uid,
+        plan=plan,
+        source="iap:google",
+        premium_until=premium_until,
+        premium_status=premium_status,
         tariff_id=matched_tariff.id if matched_tariff else None,
     )
-    auth_user = admin_auth.get_user(uid)
-    profile = _normalize_profile(
-        uid, _ensure_user_profile(uid, auth_user.email, auth_user.display_name)
+    profile = _normalize_profile(uid, final_data)
+    return IapVerifyResponse(profile=profile, platform="google", product_id=product_id)
+
+
+def _google_fast_path(
+    ctx: UserContext,
+    payload: GoogleIapVerifyRequest,
+    max_age_seconds: int,
+) -> Optional[IapVerifyResponse]:
+    # A token this user verified moments ago (e.g. restore right after purchase)
+    # that is still entitled is answered from iap_purchases instead of Google.
+    if max_age_seconds <= 0:
+        return None
+    db = get_firestore_client()
+    doc_id = f"google_{_token_hash(payload.purchase_token)}"
+    snap = db.collection("iap_purchases").document(doc_id).get()
+    if not snap.exists:
+        return None
+    stored = snap.to_dict() or {}
+    if stored.get("uid") != ctx.uid:
+        return None
+    product_id = stored.get("product_id")
+    if payload.product_id and product_id != payload.product_id:
+        return None
+    updated_at = _parse_iso(stored.get("updated_at"))
+    if not updated_at or datetime.now(timezone.utc) - updated_at > timedelta(seconds=max_age_seconds):
+        return None
+    premium_until = stored.get("expires_at")
+    premium_status = stored.get("status")
+    if premium_until is None and premium_status != "purchased":
+        return None
+    if not _compute_is_premium("premium", premium_until, premium_status):
+        return None
+
+    profile = ctx.profile
+    if (
+        profile.is_premium
+        and profile.premium_source == "iap:google"
+        and profile.premium_until == premium_until
+        and profile.premium_status == premium_status
+    ):
+        return IapVerifyResponse(profile=profile, platform="google", product_id=product_id)
+    return _apply_google_purchase(
+        ctx.uid,
+        plan="premium",
+        product_id=product_id,
+        premium_until=premium_until,
+        premium_status=premium_status,
     )
-    return IapVerifyResponse(profile=profile, platform="google", product_id=payload.product_id)
 
 
-@router.post("/iap/apple/verify", response_model=IapVerifyResponse)
-def verify_apple_iap(
-    payload: AppleIapVerifyRequest,
-    user: Dict[str, Any] = Depends(require_firebase_user),
-    settings: Settings = Depends(get_settings),
-):
-    if not payload.receipt_data:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing receipt data")
-    uid = str(user.get("uid"))
-    data = _apple_verify_receipt(settings, payload.receipt_data)
-    receipt = data.get("receipt", {}) or {}
-    latest_info = data.get("latest_receipt_info") or receipt.get("in_app") or []
-    allowed_subscriptions = settings.apple_subscription_id_set
-    allowed_products = settings.apple_product_id_set
-    allowed_ids = allowed_subscriptions.union(allowed_products)
+def _apple_plan_state(premium_until: Optional[str], purchased: bool) -> Tuple[str, str]:
+    if premium_until:
+        plan = "premium" if _compute_is_premium("premium", premium_until, "active") else "free"
+        return plan, "active" if plan == "premium" else "expired"
+    if purchased:
+        return "premium", "purchased"
+    return "free", "expired"
+
+
+def _apple_receipt_entitlement(
+    data: Dict[str, Any],
+    settings: Settings,
+    product_id: Optional[str],
+) -> Tuple[Optional[str], Optional[str], Optional[str], bool]:
+    allowed_ids = settings.apple_subscription_id_set.union(settings.apple_product_id_set)
 
     def is_cancelled(item: Dict[str, Any]) -> bool:
         return bool(item.get("cancellation_date") or item.get("cancellation_date_ms"))
 
     filtered_items = []
-    for item in latest_info:
-        product_id = item.get("product_id")
-        if payload.product_id and product_id != payload.product_id:
+    for item in _apple_receipt_items(data):
+        item_product_id = item.get("product_id")
+        if product_id and item_product_id != product_id:
             continue
-        if allowed_ids and product_id not in allowed_ids:
+        if allowed_ids and item_product_id not in allowed_ids:
             continue
         if is_cancelled(item):
             continue
@@ -2347,12 +3515,12 @@ def verify_apple_iap(
 
     premium_until = None
     max_expiry: Optional[datetime] = None
-    resolved_product_id = payload.product_id
+    resolved_product_id = product_id
     token_id = None
     for item in filtered_items:
-        product_id = item.get("product_id")
-        if not resolved_product_id and product_id:
-            resolved_product_id = product_id
+        item_product_id = item.get("product_id")
+        if not resolved_product_id and item_product_id:
+            resolved_product_id = item_product_id
         expires_ms = item.get("expires_date_ms")
         if expires_ms:
             try:
@@ -2365,26 +3533,30 @@ def verify_apple_iap(
 
     if max_expiry:
         premium_until = max_expiry.isoformat()
+    return resolved_product_id, token_id, premium_until, bool(filtered_items)
 
-    plan = "free"
-    premium_status = "expired"
-    if premium_until:
-        plan = "premium" if _compute_is_premium("premium", premium_until, "active") else "free"
-        premium_status = "active" if plan == "premium" else "expired"
-    elif filtered_items:
-        plan = "premium"
-        premium_status = "purchased"
 
+def _apply_apple_purchase(
+    uid: str,
+    *,
+    token: str,
+    product_id: Optional[str],
+    premium_until: Optional[str],
+    purchased: bool,
+    original_transaction_id: Optional[str] = None,
+) -> IapVerifyResponse:
+    plan, premium_status = _apple_plan_state(premium_until, purchased)
     _record_iap_purchase(
         "apple",
-        token_id or payload.receipt_data,
+        token,
         uid,
-        product_id=resolved_product_id,
-        status=premium_status,
+        product_id=product_id,
+        purchase_status=premium_status,
         expires_at=premium_until,
+        original_transaction_id=original_transaction_id,
     )
-    matched_tariff = _find_tariff_by_store_product_id(resolved_product_id, "ios")
-    _set_user_plan(
+    matched_tariff = _find_tariff_by_store_product_id(product_id, "ios")
+    final_data = _set_user_plan(
         uid,
         plan=plan,
         source="iap:apple",
@@ -2392,11 +3564,234 @@ def verify_apple_iap(
         premium_status=premium_status,
         tariff_id=matched_tariff.id if matched_tariff else None,
     )
-    auth_user = admin_auth.get_user(uid)
-    profile = _normalize_profile(
-        uid, _ensure_user_profile(uid, auth_user.email, auth_user.display_name)
+    profile = _normalize_profile(uid, final_data)
+    return IapVerifyResponse(profile=profile, platform="apple", product_id=product_id)
+
+
+def _apple_transaction_entitlement(
+    transaction: Dict[str, Any],
+) -> Tuple[Optional[str], Optional[str], bool]:
+    premium_until = None
+    expires_ms = transaction.get("expiresDate")
+    if isinstance(expires_ms, (int, float)) and expires_ms > 0:
+        premium_until = datetime.fromtimestamp(expires_ms / 1000, timezone.utc).isoformat()
+    revoked = bool(transaction.get("revocationDate"))
+    return transaction.get("productId"), None if revoked else premium_until, not revoked
+
+
+def _apple_subscription_entitlement(
+    settings: Settings, original_transaction_id: str
+) -> Tuple[Optional[str], Optional[str], bool]:
+    if not settings.apple_root_ca_path:
+        raise AppStoreServerError("APPLE_ROOT_CA_PATH is not configured")
+    client = get_app_store_server_client(settings)
+    data, environment = client.subscription_statuses(
+        original_transaction_id, _APPLE_ENVIRONMENTS.get(original_transaction_id)
+    )
+    _APPLE_ENVIRONMENTS.set(original_transaction_id, environment)
+    root = load_root_certificate(settings.apple_root_ca_path)
+    for group in data.get("data") or []:
+        for item in group.get("lastTransactions") or []:
+            if str(item.get("originalTransactionId")) != original_transaction_id:
+                continue
+            transaction = verify_signed_transaction(str(item.get("signedTransactionInfo") or ""), root)
+            if transaction.get("bundleId") != settings.apple_bundle_id:
+                raise AppStoreServerError("Invalid Apple transaction bundle ID")
+            return _apple_transaction_entitlement(transaction)
+    raise AppStoreServerError("Subscription status not found", status_code=404)
+
+
+def _reconcile_iap_purchase(settings: Settings, ref, stored: Dict[str, Any]) -> None:
+    uid = str(stored.get("uid") or "")
+    platform = stored.get("platform")
+    now_iso = datetime.now(timezone.utc).isoformat()
+    update: Dict[str, Any] = {"reconciled_at": now_iso}
+    legacy_token = stored.get("reverify_token")
+    if legacy_token:
+        # Older docs kept the raw token/receipt inline; move it out on first touch.
+        update["reverify_token"] = admin_firestore.DELETE_FIELD
+    if platform == "google":
+        token = _load_iap_secret(ref.id)
+        if not token and legacy_token:
+            token = legacy_token
+            _store_iap_secret("google", token)
+    elif platform == "apple":
+        token = stored.get("original_transaction_id")
+        if not token and legacy_token:
+            _, token, _, _ = _apple_receipt_entitlement(
+                _apple_verify_receipt(settings, legacy_token, uid=uid), settings, stored.get("product_id")
+            )
+            if token:
+                update["original_transaction_id"] = token
+    else:
+        token = None
+    if not uid or not token:
+        update["reconcile_after"] = None
+        ref.set(update, merge=True)
+        return
+
+    stored_product_id = stored.get("product_id")
+    if platform == "google":
+        data = _google_verify_subscription(settings, token, stored_product_id)
+        plan, product_id, premium_until, premium_status = _google_subscription_entitlement(
+            data, stored_product_id
+        )
+    else:
+        product_id, premium_until, purchased = _apple_subscription_entitlement(settings, str(token))
+        product_id = product_id or stored_product_id
+        plan, premium_status = _apple_plan_state(premium_until, purchased)
+    update.update(
+        {
+            "status": premium_status,
+            "expires_at": premium_until,
+            "updated_at": now_iso,
+            "reconcile_after": _next_reconcile_after(premium_until),
+        }
+    )
+    ref.set(update, merge=True)
+
+    # Only touch the profile when this purchase is what currently backs it, or when
+    # it newly grants premium to a user who doesn't have it.
+    source = f"iap:{platform}"
+    snapshot = _get_user_snapshot(uid)
+    current = (snapshot.to_dict() or {}) if snapshot.exists else {}
+    backs_profile = (
+        current.get("premium_source") == source
+        and current.get("premium_until") == stored.get("expires_at")
+    )
+    if not backs_profile and not (plan == "premium" and not current.get("is_premium")):
+        return
+    if premium_until == current.get("premium_until") and premium_status == current.get("premium_status"):
+        return
+    matched_tariff = _find_tariff_by_store_product_id(
+        product_id, "android" if platform == "google" else "ios"
+    )
+    _set_user_plan(
+        uid,
+        plan=plan,
+        source=source,
+        premium_until=premium_until,
+        premium_status=premium_status,
+        tariff_id=matched_tariff.id if matched_tariff else None,
+    )
+
+
+def _reconcile_iap_purchases(since: Optional[datetime]) -> None:
+    settings = get_settings()
+    db = get_firestore_client()
+    now_iso = datetime.now(timezone.utc).isoformat()
+    docs = list(
+        db.collection("iap_purchases")
+        .where("reconcile_after", "<=", now_iso)
+        .limit(_IAP_RECONCILE_BATCH)
+        .stream()
+    )
+    if not docs:
+        return
+
+    def run(doc) -> bool:
+        try:
+            _reconcile_iap_purchase(settings, doc.reference, doc.to_dict() or {})
+            return True
+        except Exception as exc:
+            logger.warning("IAP reconcile failed for %s: %s", doc.id, exc)
+            retry_at = (datetime.now(timezone.utc) + _IAP_RECONCILE_RETRY).isoformat()
+            doc.reference.set({"reconcile_after": retry_at}, merge=True)
+            return False
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, settings.iap_reconcile_concurrency),
+        thread_name_prefix="iap-reconcile",
+    ) as pool:
+        results = list(pool.map(run, docs))
+    logger.info("IAP reconcile: %s/%s purchases re-verified", sum(results), len(results))
+
+
+@router.post("/iap/apple/verify", response_model=IapVerifyResponse)
+def verify_apple_iap(
+    payload: AppleIapVerifyRequest,
+    ctx: UserContext = Depends(require_user_context),
+    settings: Settings = Depends(get_settings),
+):
+    if not payload.receipt_data:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing receipt data")
+    uid = ctx.uid
+    data = _apple_verify_receipt(settings, payload.receipt_data, uid=uid)
+    resolved_product_id, token_id, premium_until, purchased = _apple_receipt_entitlement(
+        data, settings, payload.product_id
+    )
+    return _apply_apple_purchase(
+        uid,
+        token=token_id or payload.receipt_data,
+        product_id=resolved_product_id,
+        premium_until=premium_until,
+        purchased=purchased,
+        original_transaction_id=token_id,
+    )
+
+
+@router.post("/iap/apple/verify-transaction", response_model=IapVerifyResponse)
+def verify_apple_signed_transaction(
+    payload: AppleSignedTransactionVerifyRequest,
+    ctx: UserContext = Depends(require_user_context),
+    settings: Settings = Depends(get_settings),
+):
+    if not payload.signed_transaction:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing signed transaction")
+    if not settings.apple_root_ca_path:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="APPLE_ROOT_CA_PATH is not configured",
+        )
+    if not settings.apple_bundle_id:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="APPLE_BUNDLE_ID is not configured",
+        )
+    try:
+        transaction = verify_signed_transaction(
+            payload.signed_transaction,
+            load_root_certificate(settings.apple_root_ca_path),
+        )
+    except AppleJWSError as exc:
+        logger.warning("Apple signed transaction rejected: %s", exc)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Apple transaction verification failed",
+        ) from exc
+    if transaction.get("bundleId") != settings.apple_bundle_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Apple transaction bundle ID",
+        )
+    product_id = transaction.get("productId")
+    if payload.product_id and product_id != payload.product_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Product ID mismatch",
+        )
+    allowed_ids = settings.apple_subscription_id_set.union(settings.apple_product_id_set)
+    if allowed_ids and product_id not in allowed_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Product is not configured",
+        )
+
+    token_id = str(transaction.get("originalTransactionId") or transaction.get("transactionId") or "")
+    environment = str(transaction.get("environment") or "").lower()
+    if token_id and environment in _APPLE_VERIFY_URLS:
+        _APPLE_ENVIRONMENTS.set(token_id, environment)
+        _APPLE_UID_TRANSACTIONS.set(ctx.uid, token_id)
+
+    _, premium_until, purchased = _apple_transaction_entitlement(transaction)
+    return _apply_apple_purchase(
+        ctx.uid,
+        token=token_id or payload.signed_transaction,
+        product_id=product_id,
+        premium_until=premium_until,
+        purchased=purchased,
+        original_transaction_id=str(transaction.get("originalTransactionId") or "") or None,
     )
-    return IapVerifyResponse(profile=profile, platform="apple", product_id=resolved_product_id)
 
 
 @router.get("/admin/users", response_model=AdminUserListResponse)
@@ -2428,7 +3823,7 @@ def admin_get_user(
     full: bool = True,
     admin: Dict[str, Any] = Depends(require_admin_user),
 ):
-    user_record = admin_auth.get_user(uid)
+    user_record = cache_user_record(admin_auth.get_user(uid))
     auth_data = _auth_user_to_dict(user_record)
     profile_data = _ensure_user_profile(uid, user_record.email, user_record.display_name)
     profile = _normalize_profile(uid, profile_data)
@@ -2463,14 +3858,54 @@ def admin_update_user_plan(
     }
 
 
+@router.delete("/admin/users/{uid}/auth-cache", response_model=AdminAuthCacheClearResponse)
+def admin_clear_user_auth_cache(
+    uid: str,
+    admin: Dict[str, Any] = Depends(require_admin_user),
+):
+    cleared = revoke_verified_claims(uid)
+    logger.info("Verified-claims revoked uid=%s local_entries=%s by=%s", uid, cleared, admin.get("uid"))
+    return AdminAuthCacheClearResponse(uid=uid, cleared=cleared)
+
+
+@router.get("/admin/iap/ack-queue", response_model=IapAckQueueResponse)
+def admin_get_iap_ack_queue(
+    status_filter: Optional[str] = Query(None, alias="status"),
+    token_hash: Optional[str] = None,
+    limit: int = 100,
+    admin: Dict[str, Any] = Depends(require_admin_user),
+):
+    # Looked up by sha256 of the purchase token (the queue doc id), so live tokens
+    # never end up in URLs or access logs.
+    db = get_firestore_client()
+    collection = db.collection(_IAP_ACK_QUEUE)
+    if token_hash:
+        token_hash = token_hash.strip().lower()
+        if not re.fullmatch(r"[0-9a-f]{64}", token_hash):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token hash")
+        snap = collection.document(token_hash).get()
+        docs = [snap] if snap.exists else []
+    else:
+        query = collection
+        if status_filter:
+            query = query.where("status", "==", status_filter)
+        docs = list(query.limit(max(1, min(limit, 500))).stream())
+    # Raw tokens only live in iap_secrets; this model has no field for them anyway.
+    items = [IapAckQueueItem.model_validate({**(doc.to_dict() or {}), "id": doc.id}) for doc in docs]
+    return IapAckQueueResponse(items=items)
+
+
 @router.get("/admin/tariffs", response_model=TariffPlanListResponse)
 def admin_get_tariffs(
+    request: Request,
     platform: Optional[str] = None,
     include_inactive: bool = True,
     admin: Dict[str, Any] = Depends(require_admin_user),
 ):
-    tariffs = _list_tariffs(include_inactive=include_inactive, platform=platform)
-    return TariffPlanListResponse(tariffs=tariffs)
+    _, body, etag = _get_tariff_catalog(
+        platform, include_inactive=include_inactive, paywall_only=False
+    )
+    return etag_json_response(request, None, etag=etag, body=body)
 
 
 @router.get("/admin/tariffs/{tariff_id}", response_model=TariffPlanResponse)
@@ -2516,6 +3951,7 @@ def admin_delete_tariff(
     tariff = _get_tariff_by_id(tariff_id)
     db = get_firestore_client()
     db.collection("tariff_plans").document(tariff.id).delete()
+    tariff_plans_cache.remove(tariff.id)
     return tariff
 
 
@@ -2564,6 +4000,7 @@ def admin_delete_plan_permissions(
     db = get_firestore_client()
     doc_ref = db.collection("plan_permissions").document(plan)
     doc_ref.delete()
+    plan_permissions_cache.remove(plan)
     return PlanPermissionsResponse(plan=plan, permissions={}, updated_at=None)
 
 
@@ -2619,6 +4056,7 @@ def admin_delete_ads_config(
     db = get_firestore_client()
     doc_ref = db.collection("ads_config").document(platform)
     doc_ref.delete()
+    ads_config_cache.remove(platform)
     return AdsConfigResponse(platform=platform, config={}, updated_at=None)
 
 
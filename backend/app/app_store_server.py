@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+import requests
+
+from .config import Settings
+
+_API_URLS = {
+    "production": "https://api.storekit.itunes.apple.com",
+    "sandbox": "https://api.storekit-sandbox.itunes.apple.com",
+}
+_TOKEN_LIFETIME_SECONDS = 1200
+_TOKEN_REFRESH_MARGIN_SECONDS = 60
+
+
+class AppStoreServerError(RuntimeError):
+    def __init__(self, message: str, status_code: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _load_private_key(path_or_pem: str) -> str:
+    if "BEGIN PRIVATE KEY" in path_or_pem:
+        return path_or_pem
+    with open(path_or_pem, "r", encoding="utf-8") as fh:
+        return fh.read()
+
+
+class AppStoreServerClient:
+    """App Store Server API client, so subscriptions can be re-checked by
+    original_transaction_id without keeping the app receipt around."""
+
+    def __init__(
+        self,
+        *,
+        key_id: str,
+        issuer_id: str,
+        private_key: str,
+        bundle_id: str,
+        timeout: float = 30.0,
+    ) -> None:
+        self._key_id = key_id
+        self._issuer_id = issuer_id
+        self._private_key = private_key
+        self._bundle_id = bundle_id
+        self._timeout = timeout
+        self._session = requests.Session()
+        self._token_lock = threading.Lock()
+        self._token: Optional[Tuple[str, float]] = None
+
+    def _api_token(self) -> str:
+        with self._token_lock:
+            now = time.time()
+            if self._token and self._token[1] - now > _TOKEN_REFRESH_MARGIN_SECONDS:
+                return self._token[0]
+            expires_at = now + _TOKEN_LIFETIME_SECONDS
+            token = jwt.encode(
+                {
+                    "iss": self._issuer_id,
+                    "iat": int(now),
+                    "exp": int(expires_at),
+                    "aud": "appstoreconnect-v1",
+                    "bid": self._bundle_id,
+                },
+                self._private_key,
+                algorithm="ES256",
+                headers={"kid": self._key_id, "typ": "JWT"},
+            )
+            self._token = (token, expires_at)
+            return token
+
+    def _get(self, environment: str, path: str) -> Dict[str, Any]:
+        try:
+            response = self._session.get(
+                f"{_API_URLS[environment]}{path}",
+                headers={"Authorization": f"Bearer {self._api_token()}"},
+                timeout=self._timeout,
+            )
+        except requests.RequestException as exc:
+            raise AppStoreServerError(f"App Store Server API request failed: {exc}") from exc
+        if response.status_code >= 400:
+            raise AppStoreServerError(
+                f"App Store Server API error {response.status_code}: {response.text}",
+                status_code=response.status_code,
+            )
+        return response.json() if response.content else {}
+
+    def subscription_statuses(
+        self, original_transaction_id: str, environment: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], str]:
+        """Statuses of the subscription group holding the transaction, plus the
+        environment that knew it. Tries `environment` first, then the other one."""
+        first = environment if environment in _API_URLS else "production"
+        order = [first] + [env for env in _API_URLS if env != first]
+        path = f"/inApps/v1/subscriptions/{original_transaction_id}"
+        for env in order:
+            try:
+                return self._get(env, path), env
+            except AppStoreServerError as exc:
+                if exc.status_code != 404 or env == order[-1]:
+                    raise
+        raise AppStoreServerError("Transaction not found", status_code=404)
+
+
+@lru_cache(maxsize=1)
+def _client_for(key_id: str, issuer_id: str, key_path: str, bundle_id: str) -> AppStoreServerClient:
+    return AppStoreServerClient(
+        key_id=key_id,
+        issuer_id=issuer_id,
+        private_key=_load_private_key(key_path),
+        bundle_id=bundle_id,
+    )
+
+
+def get_app_store_server_client(settings: Settings) -> AppStoreServerClient:
+    if not (
+        settings.apple_iap_key_id
+        and settings.apple_iap_issuer_id
+        and settings.apple_iap_private_key_path
+        and settings.apple_bundle_id
+    ):
+        raise AppStoreServerError(
+            "APPLE_IAP_KEY_ID, APPLE_IAP_ISSUER_ID, APPLE_IAP_PRIVATE_KEY_PATH "
+            "and APPLE_BUNDLE_ID must be configured"
+        )
+    return _client_for(
+        settings.apple_iap_key_id,
+        settings.apple_iap_issuer_id,
+        settings.apple_iap_private_key_path,
+        settings.apple_bundle_id,
+    )
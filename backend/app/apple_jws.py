@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import jwt
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import Encoding
+
+# Marker extensions Apple puts on the App Store receipt-signing leaf and on the
+# WWDR intermediate that issues it.
+_LEAF_MARKER_OID = x509.ObjectIdentifier("1.2.840.113635.100.6.11.1")
+_INTERMEDIATE_MARKER_OID = x509.ObjectIdentifier("1.2.840.113635.100.6.2.1")
+
+
+class AppleJWSError(ValueError):
+    pass
+
+
+@lru_cache(maxsize=4)
+def load_root_certificate(path: str) -> x509.Certificate:
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if b"-----BEGIN CERTIFICATE-----" in data:
+        return x509.load_pem_x509_certificate(data)
+    return x509.load_der_x509_certificate(data)
+
+
+def _not_valid_before(cert: x509.Certificate) -> datetime:
+    value = getattr(cert, "not_valid_before_utc", None)
+    return value if value is not None else cert.not_valid_before.replace(tzinfo=timezone.utc)
+
+
+def _not_valid_after(cert: x509.Certificate) -> datetime:
+    value = getattr(cert, "not_valid_after_utc", None)
+    return value if value is not None else cert.not_valid_after.replace(tzinfo=timezone.utc)
+
+
+def _verify_issued_by(cert: x509.Certificate, issuer: x509.Certificate) -> None:
+    if cert.issuer != issuer.subject:
+        raise AppleJWSError("Certificate chain is broken")
+    public_key = issuer.public_key()
+    if not isinstance(public_key, ec.EllipticCurvePublicKey):
+        raise AppleJWSError("Unsupported certificate key type")
+    try:
+        public_key.verify(
+            cert.signature,
+            cert.tbs_certificate_bytes,
+            ec.ECDSA(cert.signature_hash_algorithm),
+        )
+    except InvalidSignature as exc:
+        raise AppleJWSError("Certificate signature is invalid") from exc
+
+
+def _require_extension(cert: x509.Certificate, oid: x509.ObjectIdentifier) -> None:
+    try:
+        cert.extensions.get_extension_for_oid(oid)
+    except x509.ExtensionNotFound as exc:
+        raise AppleJWSError("Certificate is not an App Store signing certificate") from exc
+
+
+def verify_signed_transaction(
+    signed_transaction: str,
+    root_certificate: x509.Certificate,
+    *,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Verify a StoreKit 2 JWS (transaction or renewal info) entirely offline.
+
+    The x5c chain must end in `root_certificate`, every link must be signed by the
+    next and valid at the transaction's `signedDate`, and the JWS must be signed
+    by the leaf. Returns the decoded payload.
+    """
+    try:
+        header = jwt.get_unverified_header(signed_transaction)
+        unverified = jwt.decode(signed_transaction, options={"verify_signature": False})
+    except jwt.PyJWTError as exc:
+        raise AppleJWSError("Malformed signed transaction") from exc
+    if header.get("alg") != "ES256":
+        raise AppleJWSError("Unsupported signing algorithm")
+    chain = header.get("x5c")
+    if not isinstance(chain, list) or len(chain) != 3:
+        raise AppleJWSError("Missing certificate chain")
+    try:
+        leaf, intermediate, root = [
+            x509.load_der_x509_certificate(base64.b64decode(item)) for item in chain
+        ]
+    except (TypeError, ValueError) as exc:
+        raise AppleJWSError("Invalid certificate in chain") from exc
+
+    if root.public_bytes(Encoding.DER) != root_certificate.public_bytes(Encoding.DER):
+        raise AppleJWSError("Certificate chain is not anchored in the Apple root")
+    _verify_issued_by(leaf, intermediate)
+    _verify_issued_by(intermediate, root)
+    _require_extension(leaf, _LEAF_MARKER_OID)
+    _require_extension(intermediate, _INTERMEDIATE_MARKER_OID)
+
+    # Like Apple's own verifier, judge validity at signing time so old transactions
+    # stay verifiable after the leaf certificate rotates.
+    effective = now or datetime.now(timezone.utc)
+    signed_ms = unverified.get("signedDate")
+    if isinstance(signed_ms, (int, float)) and signed_ms > 0:
+        effective = datetime.fromtimestamp(signed_ms / 1000, timezone.utc)
+    for cert in (leaf, intermediate, root):
+        if not _not_valid_before(cert) <= effective <= _not_valid_after(cert):
+            raise AppleJWSError("Certificate is not valid at signing time")
+
+    try:
+        return jwt.decode(
+            signed_transaction,
+            leaf.public_key(),
+            algorithms=["ES256"],
+            options={"verify_aud": False, "verify_exp": False},
+        )
+    except jwt.PyJWTError as exc:
+        raise AppleJWSError("Signed transaction signature is invalid") from exc
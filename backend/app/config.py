@@ -1,7 +1,8 @@
 from functools import lru_cache
 import json
-from typing import List, Dict, Any
-from pydantic import Field
+from types import MappingProxyType
+from typing import Annotated, Any, Dict, FrozenSet, List, Mapping, Optional
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -28,16 +29,35 @@ class Settings(BaseSettings):
     openai_timeout_seconds: int = Field(30, env="OPENAI_TIMEOUT_SECONDS")
 
     admin_uids: str = Field("", env="ADMIN_UIDS")
+    auth_claims_cache_max_entries: int = Field(10000, env="AUTH_CLAIMS_CACHE_MAX_ENTRIES")
+    auth_user_cache_ttl_seconds: int = Field(300, env="AUTH_USER_CACHE_TTL_SECONDS")
+    auth_user_cache_max_entries: int = Field(10000, env="AUTH_USER_CACHE_MAX_ENTRIES")
+    config_cache_poll_seconds: int = Field(30, env="CONFIG_CACHE_POLL_SECONDS")
+    subscription_sweep_interval_seconds: int = Field(
+        300, env="SUBSCRIPTION_SWEEP_INTERVAL_SECONDS"
+    )
+    overspending_sweep_interval_seconds: int = Field(
+        86400, env="OVERSPENDING_SWEEP_INTERVAL_SECONDS"
+    )
 
     google_play_package_name: str | None = Field(None, env="GOOGLE_PLAY_PACKAGE_NAME")
     google_play_service_account_path: str | None = Field(
         None, env="GOOGLE_PLAY_SERVICE_ACCOUNT_PATH"
     )
+    iap_reconcile_interval_seconds: int = Field(900, env="IAP_RECONCILE_INTERVAL_SECONDS")
+    iap_reconcile_concurrency: int = Field(4, env="IAP_RECONCILE_CONCURRENCY")
+    iap_ack_queue_interval_seconds: int = Field(60, env="IAP_ACK_QUEUE_INTERVAL_SECONDS")
+    iap_fast_path_seconds: int = Field(600, env="IAP_FAST_PATH_SECONDS")
+    google_play_max_concurrency: int = Field(8, env="GOOGLE_PLAY_MAX_CONCURRENCY")
     google_play_subscription_ids: str = Field("", env="GOOGLE_PLAY_SUBSCRIPTION_IDS")
     google_play_product_ids: str = Field("", env="GOOGLE_PLAY_PRODUCT_IDS")
 
     apple_bundle_id: str | None = Field(None, env="APPLE_BUNDLE_ID")
     apple_shared_secret: str | None = Field(None, env="APPLE_SHARED_SECRET")
+    apple_root_ca_path: str | None = Field(None, env="APPLE_ROOT_CA_PATH")
+    apple_iap_key_id: str | None = Field(None, env="APPLE_IAP_KEY_ID")
+    apple_iap_issuer_id: str | None = Field(None, env="APPLE_IAP_ISSUER_ID")
+    apple_iap_private_key_path: str | None = Field(None, env="APPLE_IAP_PRIVATE_KEY_PATH")
     apple_subscription_ids: str = Field("", env="APPLE_SUBSCRIPTION_IDS")
     apple_product_ids: str = Field("", env="APPLE_PRODUCT_IDS")
     apple_auth_audiences: str = Field("", env="APPLE_AUTH_AUDIENCES")
@@ -52,101 +72,136 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
+    _compiled: Optional["CompiledSettings"] = PrivateAttr(None)
+
     @property
     def valid_audiences(self) -> List[str]:
         # Enforce the single Web client ID audience for all platforms
         return [self.google_web_client_id]
 
     @property
-    def admin_uid_set(self) -> set[str]:
-        return {uid.strip() for uid in self.admin_uids.split(",") if uid.strip()}
+    def compiled(self) -> "CompiledSettings":
+        if self._compiled is None:
+            self.compile()
+        return self._compiled
+
+    def compile(self) -> "CompiledSettings":
+        self._compiled = CompiledSettings.from_settings(self)
+        return self._compiled
 
     @property
-    def google_play_subscription_id_set(self) -> set[str]:
-        return {
-            pid.strip()
-            for pid in self.google_play_subscription_ids.split(",")
-            if pid.strip()
-        }
+    def admin_uid_set(self) -> FrozenSet[str]:
+        return self.compiled.admin_uids
 
     @property
-    def google_play_product_id_set(self) -> set[str]:
-        return {
-            pid.strip()
-            for pid in self.google_play_product_ids.split(",")
-            if pid.strip()
-        }
+    def google_play_subscription_id_set(self) -> FrozenSet[str]:
+        return self.compiled.google_play_subscription_ids
 
     @property
-    def apple_subscription_id_set(self) -> set[str]:
-        return {
-            pid.strip()
-            for pid in self.apple_subscription_ids.split(",")
-            if pid.strip()
-        }
+    def google_play_product_id_set(self) -> FrozenSet[str]:
+        return self.compiled.google_play_product_ids
 
     @property
-    def apple_product_id_set(self) -> set[str]:
-        return {
-            pid.strip()
-            for pid in self.apple_product_ids.split(",")
-            if pid.strip()
-        }
+    def apple_subscription_id_set(self) -> FrozenSet[str]:
+        return self.compiled.apple_subscription_ids
 
     @property
-    def apple_auth_audience_set(self) -> set[str]:
-        configured = {
-            audience.strip()
-            for audience in self.apple_auth_audiences.split(",")
-            if audience.strip()
-        }
-        if configured:
-            return configured
-        if self.apple_bundle_id:
-            return {self.apple_bundle_id.strip()}
-        return set()
+    def apple_product_id_set(self) -> FrozenSet[str]:
+        return self.compiled.apple_product_ids
 
     @property
-    def default_permissions_free_dict(self) -> Dict[str, Any]:
-        try:
-            data = json.loads(self.default_permissions_free)
-        except Exception:
-            data = {}
-        if isinstance(data, dict):
-            return {str(k): v for k, v in data.items()}
-        return {}
+    def apple_auth_audience_set(self) -> FrozenSet[str]:
+        return self.compiled.apple_auth_audiences
 
     @property
-    def default_permissions_premium_dict(self) -> Dict[str, Any]:
-        try:
-            data = json.loads(self.default_permissions_premium)
-        except Exception:
-            data = {}
-        if isinstance(data, dict):
-            return {str(k): v for k, v in data.items()}
-        return {}
+    def default_permissions_free_dict(self) -> Mapping[str, Any]:
+        return self.compiled.default_permissions_free
 
     @property
-    def default_ads_config_ios_dict(self) -> Dict[str, Any]:
-        try:
-            data = json.loads(self.default_ads_config_ios)
-        except Exception:
-            data = {}
-        if isinstance(data, dict):
-            return {str(k): v for k, v in data.items()}
-        return {}
+    def default_permissions_premium_dict(self) -> Mapping[str, Any]:
+        return self.compiled.default_permissions_premium
 
     @property
-    def default_ads_config_android_dict(self) -> Dict[str, Any]:
-        try:
-            data = json.loads(self.default_ads_config_android)
-        except Exception:
-            data = {}
-        if isinstance(data, dict):
-            return {str(k): v for k, v in data.items()}
-        return {}
+    def default_ads_config_ios_dict(self) -> Mapping[str, Any]:
+        return self.compiled.default_ads_config_ios
+
+    @property
+    def default_ads_config_android_dict(self) -> Mapping[str, Any]:
+        return self.compiled.default_ads_config_android
+
+
+def _split_csv(raw: str) -> FrozenSet[str]:
+    return frozenset(item.strip() for item in raw.split(",") if item.strip())
+
+
+def _parse_json_object(env_name: str, raw: str) -> Dict[str, Any]:
+    try:
+        data = json.loads(raw or "{}")
+    except ValueError as exc:
+        raise ValueError(f"{env_name} is not valid JSON: {exc}") from exc
+    if not isinstance(data, dict):
+        raise ValueError(f"{env_name} must be a JSON object")
+    return {str(k): v for k, v in data.items()}
+
+
+ReadOnlyMapping = Annotated[Mapping[str, Any], AfterValidator(MappingProxyType)]
+
+
+class CompiledSettings(BaseModel):
+    """Derived values of `Settings`, parsed once; read-only."""
+
+    model_config = ConfigDict(frozen=True)
+
+    admin_uids: FrozenSet[str]
+    google_play_subscription_ids: FrozenSet[str]
+    google_play_product_ids: FrozenSet[str]
+    apple_subscription_ids: FrozenSet[str]
+    apple_product_ids: FrozenSet[str]
+    apple_auth_audiences: FrozenSet[str]
+    default_permissions_free: ReadOnlyMapping
+    default_permissions_premium: ReadOnlyMapping
+    default_ads_config_ios: ReadOnlyMapping
+    default_ads_config_android: ReadOnlyMapping
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "CompiledSettings":
+        audiences = _split_csv(settings.apple_auth_audiences)
+        if not audiences and settings.apple_bundle_id:
+            audiences = frozenset({settings.apple_bundle_id.strip()})
+        return cls(
+            admin_uids=_split_csv(settings.admin_uids),
+            google_play_subscription_ids=_split_csv(settings.google_play_subscription_ids),
+            google_play_product_ids=_split_csv(settings.google_play_product_ids),
+            apple_subscription_ids=_split_csv(settings.apple_subscription_ids),
+            apple_product_ids=_split_csv(settings.apple_product_ids),
+            apple_auth_audiences=audiences,
+            default_permissions_free=_parse_json_object(
+                "DEFAULT_PERMISSIONS_FREE", settings.default_permissions_free
+            ),
+            default_permissions_premium=_parse_json_object(
+                "DEFAULT_PERMISSIONS_PREMIUM", settings.default_permissions_premium
+            ),
+            default_ads_config_ios=_parse_json_object(
+                "DEFAULT_ADS_CONFIG_IOS", settings.default_ads_config_ios
+            ),
+            default_ads_config_android=_parse_json_object(
+                "DEFAULT_ADS_CONFIG_ANDROID", settings.default_ads_config_android
+            ),
+        )
 
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    return Settings()
+    settings = Settings()
+    # Compile eagerly so malformed list/JSON values fail at startup, not mid-request.
+    settings.compile()
+    return settings
+
+
+def reload_settings() -> Settings:
+    """Re-read env/.env; later `get_settings()` calls (and dependencies) see the result.
+
+    Already-initialized clients (Firebase app, key stores, jobs) are not rebuilt.
+    """
+    get_settings.cache_clear()
+    return get_settings()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import copy
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from .firebase import get_firestore_client
+from .jobs import start_periodic_job
+
+logger = logging.getLogger("config_cache")
+
+Listener = Callable[[Dict[str, Dict[str, Any]]], None]
+
+
+class CollectionCache:
+    """In-memory mirror of a small, rarely-changing Firestore collection.
+
+    Kept current by a snapshot listener (or polling when listening fails) and
+    updated synchronously by the admin write handlers, so reads do no I/O.
+    """
+
+    def __init__(self, collection: str) -> None:
+        self.collection = collection
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._watch = None
+        self._listeners: List[Listener] = []
+
+    def start(self, *, poll_interval_seconds: float) -> None:
+        self.reload()
+        try:
+            collection_ref = get_firestore_client().collection(self.collection)
+            self._watch = collection_ref.on_snapshot(self._on_snapshot)
+            logger.info("Config cache %s listening for changes", self.collection)
+        except Exception as exc:
+            logger.warning(
+                "Config cache %s listener unavailable, polling every %ss: %s",
+                self.collection,
+                poll_interval_seconds,
+                exc,
+            )
+            start_periodic_job(
+                f"config_cache:{self.collection}",
+                poll_interval_seconds,
+                lambda _since: self.reload(),
+                lease=False,
+            )
+
+    def reload(self) -> None:
+        collection_ref = get_firestore_client().collection(self.collection)
+        docs = {doc.id: doc.to_dict() or {} for doc in collection_ref.stream()}
+        self._replace(docs)
+
+    def subscribe(self, listener: Listener) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+            if self._loaded:
+                listener(self._docs)
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        self.ensure_loaded()
+        doc = self._docs.get(doc_id)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        self.ensure_loaded()
+        return copy.deepcopy(self._docs)
+
+    def put(self, doc_id: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            docs = dict(self._docs)
+            docs[doc_id] = copy.deepcopy(data)
+            self._replace(docs)
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            if doc_id not in self._docs:
+                return
+            docs = dict(self._docs)
+            docs.pop(doc_id, None)
+            self._replace(docs)
+
+    def ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.reload()
+
+    def _on_snapshot(self, snapshots, _changes, _read_time) -> None:
+        try:
+            self._replace({doc.id: doc.to_dict() or {} for doc in snapshots})
+        except Exception as exc:
+            logger.warning("Config cache %s snapshot failed: %s", self.collection, exc)
+
+    def _replace(self, docs: Dict[str, Dict[str, Any]]) -> None:
+        with self._lock:
+            self._docs = docs
+            self._loaded = True
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(docs)
+            except Exception as exc:
+                logger.warning("Config cache %s listener failed: %s", self.collection, exc)
+
+
+plan_permissions_cache = CollectionCache("plan_permissions")
+ads_config_cache = CollectionCache("ads_config")
+tariff_plans_cache = CollectionCache("tariff_plans")
+
+
+def start_config_caches(poll_interval_seconds: float) -> None:
+    for cache in (plan_permissions_cache, ads_config_cache, tariff_plans_cache):
+        cache.start(poll_interval_seconds=poll_interval_seconds)
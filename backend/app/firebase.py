@@ -1,6 +1,9 @@
 import base64
 import binascii
+import hashlib
 import json
+import logging
+import time
 from pathlib import Path
 from typing import Any, Optional
 
@@ -15,12 +18,38 @@ from firebase_admin import firestore
 from firebase_admin import credentials
 
 from .config import Settings
+from .core.cache import TTLCache
 
 
 class FirebaseNotInitialized(Exception):
     pass
 
 
+# Verified ID-token claims keyed by sha256(token); entries expire at the token's `exp`.
+_VERIFIED_CLAIMS: TTLCache[dict[str, Any]] = TTLCache(max_entries=10000)
+_CLAIMS_EXPIRY_SKEW_SECONDS = 30
+
+# The claims cache is per process, so revocations go through one Firestore doc
+# ({uid: revoked_at} for the last token lifetime) that every worker re-reads at
+# most every _REVOCATIONS_TTL_SECONDS. Tokens issued before a uid's revocation
+# bypass the cache and are re-verified with check_revoked on each request.
+_REVOCATIONS_COLLECTION = "auth_revocations"
+_REVOCATIONS_DOC = "recent"
+_REVOCATIONS_TTL_SECONDS = 15.0
+_ID_TOKEN_MAX_LIFETIME_SECONDS = 3600
+_REVOCATIONS_FAILURE_TTL_SECONDS = 5.0
+_REVOCATIONS: TTLCache[dict[str, float]] = TTLCache(
+    max_entries=1, default_ttl=_REVOCATIONS_TTL_SECONDS
+)
+# Last successfully read revocations, served (briefly cached) while Firestore fails.
+_last_revocations: dict[str, float] = {}
+
+logger = logging.getLogger("firebase")
+
+# Firebase Auth user records keyed by uid, so profile reads skip Identity Toolkit.
+_USER_RECORDS: TTLCache[admin_auth.UserRecord] = TTLCache(max_entries=10000, default_ttl=300)
+
+
 def _looks_like_filesystem_path(value: str) -> bool:
     return (
         "/" in value
@@ -136,13 +165,139 @@ def init_firebase(settings: Settings) -> None:
     firebase_admin.initialize_app(cred, {
         "projectId": settings.firebase_project_id,
     })
+    _VERIFIED_CLAIMS.max_entries = max(1, settings.auth_claims_cache_max_entries)
+    _USER_RECORDS.max_entries = max(1, settings.auth_user_cache_max_entries)
+    _USER_RECORDS.default_ttl = float(settings.auth_user_cache_ttl_seconds)
 
 
-def get_or_create_user(uid: str, email: Optional[str], display_name: Optional[str], photo_url: Optional[str]):
+def _recent_revocations() -> dict[str, float]:
+    global _last_revocations
+    cached = _REVOCATIONS.get(_REVOCATIONS_DOC)
+    if cached is not None:
+        return cached
     try:
-        return admin_auth.get_user(uid)
-    except admin_auth.UserNotFoundError:
-        pass
+        snapshot = (
+            get_firestore_client()
+            .collection(_REVOCATIONS_COLLECTION)
+            .document(_REVOCATIONS_DOC)
+            .get()
+        )
+    except Exception as exc:
+        logger.warning("Auth revocations unavailable: %s", exc)
+        # Don't turn an outage into one extra Firestore read per request.
+        _REVOCATIONS.set(
+            _REVOCATIONS_DOC, _last_revocations, ttl=_REVOCATIONS_FAILURE_TTL_SECONDS
+        )
+        return _last_revocations
+    uids = (snapshot.to_dict() or {}).get("uids") if snapshot.exists else None
+    revocations = {str(uid): float(at) for uid, at in (uids or {}).items()}
+    _REVOCATIONS.set(_REVOCATIONS_DOC, revocations)
+    _last_revocations = revocations
+    return revocations
+
+
+def _revoked_since_issued(claims: dict[str, Any]) -> bool:
+    revoked_at = _recent_revocations().get(str(claims.get("uid") or ""))
+    if revoked_at is None:
+        return False
+    try:
+        return float(claims.get("iat") or 0) <= revoked_at
+    except (TypeError, ValueError):
+        return True
+
+
+def verify_id_token(token: str) -> dict[str, Any]:
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    cached = _VERIFIED_CLAIMS.get(key)
+    if cached is not None:
+        if not _revoked_since_issued(cached):
+            return dict(cached)
+        _VERIFIED_CLAIMS.pop(key)
+        return admin_auth.verify_id_token(token, check_revoked=True)
+    claims = admin_auth.verify_id_token(token)
+    if _revoked_since_issued(claims):
+        return admin_auth.verify_id_token(token, check_revoked=True)
+    try:
+        expires_at = float(claims.get("exp") or 0) - _CLAIMS_EXPIRY_SKEW_SECONDS
+    except (TypeError, ValueError):
+        expires_at = 0.0
+    if expires_at > time.time():
+        _VERIFIED_CLAIMS.set(key, dict(claims), expires_at=expires_at)
+    return claims
+
+
+def clear_verified_claims(uid: Optional[str] = None) -> int:
+    if uid is None:
+        count = len(_VERIFIED_CLAIMS)
+        _VERIFIED_CLAIMS.clear()
+        return count
+    return _VERIFIED_CLAIMS.discard_where(lambda _key, claims: claims.get("uid") == uid)
+
+
+def revoke_verified_claims(uid: str) -> int:
+    """Stop serving cached claims for `uid` in every worker.
+
+    Takes effect here immediately and in other workers within
+    _REVOCATIONS_TTL_SECONDS. Tokens issued before now are then re-verified with
+    check_revoked, so they fail once the user is disabled or their refresh tokens
+    are revoked. Returns the entries dropped from this process's cache.
+    """
+    now = time.time()
+    ref = get_firestore_client().collection(_REVOCATIONS_COLLECTION).document(_REVOCATIONS_DOC)
+
+    @firestore.transactional
+    def run(transaction) -> None:
+        snapshot = ref.get(transaction=transaction)
+        uids = (snapshot.to_dict() or {}).get("uids") if snapshot.exists else None
+        # Older entries only cover tokens that have expired anyway.
+        horizon = now - _ID_TOKEN_MAX_LIFETIME_SECONDS
+        recent = {key: at for key, at in (uids or {}).items() if float(at) > horizon}
+        recent[uid] = now
+        transaction.set(ref, {"uids": recent, "updated_at": now})
+
+    run(get_firestore_client().transaction())
+    _REVOCATIONS.pop(_REVOCATIONS_DOC)
+    return clear_verified_claims(uid)
+
+
+def get_user_record(uid: str) -> admin_auth.UserRecord:
+    cached = _USER_RECORDS.get(uid)
+    if cached is not None:
+        return cached
+    user = admin_auth.get_user(uid)
+    _USER_RECORDS.set(uid, user)
+    return user
+
+
+def cache_user_record(user: admin_auth.UserRecord) -> admin_auth.UserRecord:
+    _USER_RECORDS.set(user.uid, user)
+    return user
+
+
+def invalidate_user_record(uid: str) -> None:
+    _USER_RECORDS.pop(uid)
+
+
+def get_or_create_user(uid: str, email: Optional[str], display_name: Optional[str], photo_url: Optional[str]):
+    invalidate_user_record(uid)
+    return cache_user_record(_get_or_create_user(uid, email, display_name, photo_url))
+
+
+def _get_or_create_user(uid: str, email: Optional[str], display_name: Optional[str], photo_url: Optional[str]):
+    # One batched lookup answers both "does this uid exist" and "is the email
+    # already taken by another account".
+    identifiers: list[Any] = [admin_auth.UidIdentifier(uid)]
+    if email:
+        identifiers.append(admin_auth.EmailIdentifier(email))
+    lookup = admin_auth.get_users(identifiers)
+    by_email = None
+    for found in lookup.users:
+        if found.uid == uid:
+            return found
+        if email and found.email and found.email.lower() == email.lower():
+            by_email = found
+    if by_email is not None:
+        return _merge_existing_user(by_email, display_name, photo_url)
 
     try:
         return admin_auth.create_user(
@@ -155,22 +310,28 @@ def get_or_create_user(uid: str, email: Optional[str], display_name: Optional[st
     except admin_auth.EmailAlreadyExistsError:
         if not email:
             raise
-        existing = admin_auth.get_user_by_email(email)
-        updates = {}
-        if display_name and not existing.display_name:
-            updates["display_name"] = display_name
-        if photo_url and not existing.photo_url:
-            updates["photo_url"] = photo_url
-        if not existing.email_verified:
-            updates["email_verified"] = True
-        if updates:
-            admin_auth.update_user(existing.uid, **updates)
-            return admin_auth.get_user(existing.uid)
-        return existing
+        return _merge_existing_user(admin_auth.get_user_by_email(email), display_name, photo_url)
     except admin_auth.UidAlreadyExistsError:
         return admin_auth.get_user(uid)
 
 
+def _merge_existing_user(
+    existing: admin_auth.UserRecord,
+    display_name: Optional[str],
+    photo_url: Optional[str],
+) -> admin_auth.UserRecord:
+    updates = {}
+    if display_name and not existing.display_name:
+        updates["display_name"] = display_name
+    if photo_url and not existing.photo_url:
+        updates["photo_url"] = photo_url
+    if not existing.email_verified:
+        updates["email_verified"] = True
+    if updates:
+        return admin_auth.update_user(existing.uid, **updates)
+    return existing
+
+
 def create_custom_token(uid: str, claims: Optional[dict] = None) -> str:
     if not firebase_admin._apps:
         raise FirebaseNotInitialized("Firebase not initialized")
@@ -3,7 +3,7 @@ from __future__ import annotations
 import logging
 import time
 from datetime import date, datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import requests
 
@@ -16,6 +16,11 @@ _CACHE: Dict[str, Any] = {
     "fetched_at": 0.0,
 }
 _BASE_CURRENCY = "UZS"
+# Same fallbacks as the app (src/services/userData.ts): a profile's display
+# `currency` defaults to USD, its `baseCurrency` (and so unset wallet currencies)
+# to UZS.
+DEFAULT_CURRENCY = "USD"
+DEFAULT_BASE_CURRENCY = _BASE_CURRENCY
 _FX_DAILY_COLLECTION = "fx_rates_daily"
 logger = logging.getLogger("fx")
 
@@ -244,13 +249,41 @@ def get_cbu_rates(settings: Settings) -> Dict[str, Any]:
     return payload
 
 
+def conversion_factor(from_code: str, to_code: str, rates: Dict[str, float]) -> Optional[float]:
+    if from_code == to_code:
+        return 1.0
+    from_rate = 1.0 if from_code == "UZS" else rates.get(from_code)
+    to_rate = 1.0 if to_code == "UZS" else rates.get(to_code)
+    if not from_rate or not to_rate:
+        return None
+    return from_rate / to_rate
+
+
 def convert_amount(amount: float, from_ccy: str, to_ccy: str, rates: Dict[str, float]) -> float:
     from_code = str(from_ccy or "").upper()
     to_code = str(to_ccy or "").upper()
     if from_code == to_code or not rates:
         return amount
-    from_rate = 1.0 if from_code == "UZS" else rates.get(from_code)
-    to_rate = 1.0 if to_code == "UZS" else rates.get(to_code)
-    if not from_rate or not to_rate:
-        return amount
-    return (amount * from_rate) / to_rate
+    factor = conversion_factor(from_code, to_code, rates)
+    return amount if factor is None else amount * factor
+
+
+def convert_amounts(
+    amounts: Sequence[float],
+    from_ccys: Sequence[str],
+    to_ccy: str,
+    rates: Dict[str, float],
+) -> Tuple[List[Optional[float]], List[str]]:
+    """Vector form of convert_amount: one factor per distinct currency.
+
+    Unlike convert_amount there is no silent fallback: amounts whose currency has
+    no rate come back as None, and their codes are returned alongside.
+    """
+    to_code = str(to_ccy or "").upper()
+    codes = [str(code or "").upper() for code in from_ccys]
+    factors = {code: conversion_factor(code, to_code, rates or {}) for code in set(codes)}
+    converted = [
+        None if factors[code] is None else amount * factors[code]
+        for amount, code in zip(amounts, codes)
+    ]
+    return converted, sorted(code for code, factor in factors.items() if factor is None)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import requests
+from google.auth.exceptions import GoogleAuthError
+from google.auth.transport import requests as google_requests
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+
+from .config import Settings
+
+GOOGLE_PLAY_SCOPE = "https://www.googleapis.com/auth/androidpublisher"
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+_TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 8.0
+
+logger = logging.getLogger("google_play")
+
+
+class GooglePlayError(RuntimeError):
+    def __init__(self, message: str, status_code: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _load_service_account_info(path_or_json: str) -> Dict[str, Any]:
+    try:
+        return json.loads(path_or_json)
+    except Exception:
+        with open(path_or_json, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+
+
+class GooglePlayClient:
+    """Thread-safe Android Publisher API client.
+
+    One keep-alive connection pool, an access token refreshed under a lock shortly
+    before it expires, at most `max_concurrency` requests in flight, and retries
+    with jittered exponential backoff on 429/5xx and connection errors.
+    """
+
+    def __init__(
+        self,
+        credentials: service_account.Credentials,
+        *,
+        max_concurrency: int = 8,
+        max_attempts: int = 3,
+        timeout: float = 30.0,
+    ) -> None:
+        self._credentials = credentials
+        self._max_attempts = max(1, max_attempts)
+        self._timeout = timeout
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, max_concurrency))
+        self._session.mount("https://", adapter)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self._token_lock = threading.Lock()
+
+    def get(self, url: str) -> Dict[str, Any]:
+        return self._request("GET", url)
+
+    def post(self, url: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return self._request("POST", url, json=payload or {})
+
+    def _access_token(self, *, force: bool = False) -> str:
+        creds = self._credentials
+        if force or self._token_expiring(creds):
+            with self._token_lock:
+                if force or self._token_expiring(creds):
+                    try:
+                        creds.refresh(google_requests.Request(session=self._session))
+                    except GoogleAuthError as exc:
+                        raise GooglePlayError(f"Google Play token refresh failed: {exc}") from exc
+        if not creds.token:
+            raise GooglePlayError("Google Play access token unavailable")
+        return creds.token
+
+    @staticmethod
+    def _token_expiring(creds: service_account.Credentials) -> bool:
+        if not creds.token or creds.expiry is None:
+            return True
+        # google-auth keeps `expiry` as naive UTC.
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return creds.expiry - now <= _TOKEN_REFRESH_MARGIN
+
+    def _request(self, method: str, url: str, **kwargs: Any) -> Dict[str, Any]:
+        attempt = 0
+        force_refresh = False
+        while True:
+            attempt += 1
+            last_attempt = attempt >= self._max_attempts
+            headers = {"Authorization": f"Bearer {self._access_token(force=force_refresh)}"}
+            force_refresh = False
+            try:
+                with self._slots:
+                    response = self._session.request(
+                        method, url, headers=headers, timeout=self._timeout, **kwargs
+                    )
+            except requests.RequestException as exc:
+                if last_attempt:
+                    raise GooglePlayError(f"Google Play request failed: {exc}") from exc
+                self._backoff(attempt, None)
+                continue
+
+            if response.status_code == 401 and not last_attempt:
+                # Token revoked or expired early; refresh and retry.
+                force_refresh = True
+                continue
+            if response.status_code in _RETRY_STATUSES and not last_attempt:
+                self._backoff(attempt, response.headers.get("Retry-After"))
+                continue
+            if response.status_code >= 400:
+                raise GooglePlayError(
+                    f"Google Play API error {response.status_code}: {response.text}",
+                    status_code=response.status_code,
+                )
+            return response.json() if response.content else {}
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str]) -> None:
+        delay = random.uniform(0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(_BACKOFF_MAX_SECONDS, float(retry_after)))
+        time.sleep(delay)
+
+
+@lru_cache(maxsize=1)
+def _client_for(path_or_json: str, max_concurrency: int) -> GooglePlayClient:
+    credentials = service_account.Credentials.from_service_account_info(
+        _load_service_account_info(path_or_json), scopes=[GOOGLE_PLAY_SCOPE]
+    )
+    return GooglePlayClient(credentials, max_concurrency=max_concurrency)
+
+
+def get_google_play_client(settings: Settings) -> GooglePlayClient:
+    if not settings.google_play_service_account_path:
+        raise GooglePlayError("GOOGLE_PLAY_SERVICE_ACCOUNT_PATH is not configured")
+    return _client_for(
+        settings.google_play_service_account_path,
+        settings.google_play_max_concurrency,
+    )
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from cryptography import x509
+from jwt.algorithms import RSAAlgorithm
+
+GOOGLE_OAUTH2_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+APPLE_AUTH_KEYS_URL = "https://appleid.apple.com/auth/keys"
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)", re.IGNORECASE)
+_MIN_TTL_SECONDS = 60.0
+_REFRESH_MARGIN_SECONDS = 300.0
+_UNKNOWN_KID_COOLDOWN_SECONDS = 30.0
+_FAILED_FETCH_COOLDOWN_SECONDS = 5.0
+
+logger = logging.getLogger("identity_keys")
+
+
+class KeyStoreError(RuntimeError):
+    pass
+
+
+def _max_age_seconds(cache_control: Optional[str]) -> Optional[float]:
+    match = _MAX_AGE_RE.search(cache_control or "")
+    if not match:
+        return None
+    return float(match.group(1))
+
+
+class RefreshingKeyStore:
+    """Process-wide public-key store indexed by `kid`.
+
+    Keys are fetched over one keep-alive session, parsed once, refreshed in the
+    background ahead of expiry and served stale while a refresh is running, but
+    never more than `max_stale` seconds past expiry: after that lookups refresh
+    inline and raise KeyStoreError if the provider is still unreachable.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        *,
+        parse: Callable[[Any], Dict[str, Any]],
+        default_ttl: float,
+        max_stale: float = 3600.0,
+        timeout: float = 10.0,
+    ) -> None:
+        self.name = name
+        self.url = url
+        self._parse = parse
+        self._default_ttl = default_ttl
+        self._max_stale = max_stale
+        self._timeout = timeout
+        self._session = requests.Session()
+        self._keys: Dict[str, Any] = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._failed_at = 0.0
+        self._fetch_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._refreshing = False
+
+    def warm(self) -> None:
+        try:
+            self.refresh()
+        except KeyStoreError as exc:
+            logger.warning("%s key store warm-up failed: %s", self.name, exc)
+
+    def keys(self) -> Dict[str, Any]:
+        keys = self._keys
+        now = time.time()
+        if not keys or now >= self._expires_at + self._max_stale:
+            return self._refresh_unusable()
+        if now >= self._expires_at:
+            self._refresh_in_background()
+        return keys
+
+    def get_key(self, kid: str) -> Optional[Any]:
+        key = self.keys().get(kid)
+        if key is not None:
+            return key
+        # Unknown kid usually means the provider rotated keys: refetch once, shared
+        # by every caller that is waiting on the same rotation.
+        requested_at = time.time()
+        with self._fetch_lock:
+            if self._fetched_at < requested_at - _UNKNOWN_KID_COOLDOWN_SECONDS:
+                self._fetch_locked()
+        return self._keys.get(kid)
+
+    def refresh(self) -> Dict[str, Any]:
+        with self._fetch_lock:
+            return self._fetch_locked()
+
+    def _refresh_unusable(self) -> Dict[str, Any]:
+        with self._fetch_lock:
+            now = time.time()
+            if self._keys and now < self._expires_at + self._max_stale:
+                return self._keys
+            # Don't queue every request behind a fetch that just failed.
+            if now - self._failed_at < _FAILED_FETCH_COOLDOWN_SECONDS:
+                raise KeyStoreError(f"{self.name} keys unavailable")
+            return self._fetch_locked()
+
+    def _fetch_locked(self) -> Dict[str, Any]:
+        try:
+            keys, response = self._download()
+        except KeyStoreError:
+            self._failed_at = time.time()
+            raise
+
+        ttl = _max_age_seconds(response.headers.get("Cache-Control"))
+        ttl = max(_MIN_TTL_SECONDS, ttl if ttl is not None else self._default_ttl)
+        now = time.time()
+        with self._state_lock:
+            self._keys = keys
+            self._fetched_at = now
+            self._expires_at = now + ttl
+        self._schedule_refresh(max(_MIN_TTL_SECONDS, ttl - _REFRESH_MARGIN_SECONDS))
+        return keys
+
+    def _download(self):
+        try:
+            response = self._session.get(self.url, timeout=self._timeout)
+        except requests.RequestException as exc:
+            raise KeyStoreError(f"{self.name} keys fetch failed: {exc}") from exc
+        if response.status_code >= 400:
+            raise KeyStoreError(f"{self.name} keys fetch failed: HTTP {response.status_code}")
+        try:
+            keys = self._parse(response.json())
+        except Exception as exc:
+            raise KeyStoreError(f"{self.name} keys response invalid: {exc}") from exc
+        if not keys:
+            raise KeyStoreError(f"{self.name} keys response invalid: no keys")
+        return keys, response
+
+    def _schedule_refresh(self, delay: float) -> None:
+        with self._state_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            timer = threading.Timer(delay, self._background_refresh)
+            timer.daemon = True
+            self._timer = timer
+        timer.start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except KeyStoreError as exc:
+            logger.warning("%s key store background refresh failed: %s", self.name, exc)
+            self._schedule_refresh(_MIN_TTL_SECONDS)
+        finally:
+            with self._state_lock:
+                self._refreshing = False
+
+    def _refresh_in_background(self) -> None:
+        with self._state_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        thread = threading.Thread(target=self._background_refresh, daemon=True)
+        thread.start()
+
+
+def _parse_google_certs(payload: Any) -> Dict[str, Any]:
+    if not isinstance(payload, dict):
+        return {}
+    keys: Dict[str, Any] = {}
+    for kid, pem in payload.items():
+        if not isinstance(pem, str):
+            continue
+        cert = x509.load_pem_x509_certificate(pem.encode("utf-8"))
+        keys[str(kid)] = cert.public_key()
+    return keys
+
+
+google_cert_store = RefreshingKeyStore(
+    "Google",
+    GOOGLE_OAUTH2_CERTS_URL,
+    parse=_parse_google_certs,
+    default_ttl=3600.0,
+)
+
+
+def _parse_apple_jwks(payload: Any) -> Dict[str, Any]:
+    items = payload.get("keys") if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        return {}
+    keys: Dict[str, Any] = {}
+    for item in items:
+        if not isinstance(item, dict) or not item.get("kid"):
+            continue
+        keys[str(item["kid"])] = RSAAlgorithm.from_jwk(item)
+    return keys
+
+
+apple_key_store = RefreshingKeyStore(
+    "Apple",
+    APPLE_AUTH_KEYS_URL,
+    parse=_parse_apple_jwks,
+    default_ttl=3600.0,
+)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from firebase_admin import firestore as admin_firestore
+
+from .firebase import get_firestore_client
+
+_LEASES_COLLECTION = "job_leases"
+_HOLDER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+logger = logging.getLogger("jobs")
+
+JobFn = Callable[[Optional[datetime]], None]
+
+
+class PeriodicJob:
+    """Runs `fn(since)` every `interval_seconds` on a daemon thread.
+
+    With `lease=True` only one process across all workers/containers runs a given
+    job per interval (a Firestore lease doc), and `since` is the start time of the
+    last successful run anywhere. Without a lease every process runs it and
+    `since` is local.
+    """
+
+    def __init__(self, name: str, interval_seconds: float, fn: JobFn, *, lease: bool = True) -> None:
+        self.name = name
+        self.interval_seconds = max(1.0, float(interval_seconds))
+        self.fn = fn
+        self.lease = lease
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_success: Optional[datetime] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._loop, name=f"job-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def join(self, timeout: float) -> None:
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def run_once(self) -> bool:
+        started_at = datetime.now(timezone.utc)
+        since = self._last_success
+        if self.lease:
+            acquired, since = _acquire_lease(self.name, self.interval_seconds)
+            if not acquired:
+                return False
+        self.fn(since)
+        self._last_success = started_at
+        if self.lease:
+            _complete_lease(self.name, started_at)
+        return True
+
+    def _loop(self) -> None:
+        # Spread workers out so they don't all hit the lease doc at once.
+        self._stop.wait(random.uniform(0, min(30.0, self.interval_seconds)))
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as exc:
+                logger.exception("Job %s failed: %s", self.name, exc)
+            self._stop.wait(self.interval_seconds)
+
+
+_JOBS: Dict[str, PeriodicJob] = {}
+
+
+def start_periodic_job(
+    name: str,
+    interval_seconds: float,
+    fn: JobFn,
+    *,
+    lease: bool = True,
+) -> Optional[PeriodicJob]:
+    if interval_seconds <= 0:
+        logger.info("Job %s disabled", name)
+        return None
+    job = _JOBS.get(name)
+    if job is None:
+        job = PeriodicJob(name, interval_seconds, fn, lease=lease)
+        _JOBS[name] = job
+    job.start()
+    return job
+
+
+def stop_all_jobs(timeout_seconds: float = 10.0) -> None:
+    """Stop every job and give runs in flight a moment to finish, so they release
+    their lease instead of leaving it to expire. Called on app shutdown."""
+    jobs = list(_JOBS.values())
+    for job in jobs:
+        job.stop()
+    deadline = time.monotonic() + timeout_seconds
+    for job in jobs:
+        job.join(max(0.0, deadline - time.monotonic()))
+    _JOBS.clear()
+
+
+def _acquire_lease(name: str, interval_seconds: float) -> tuple[bool, Optional[datetime]]:
+    db = get_firestore_client()
+    ref = db.collection(_LEASES_COLLECTION).document(name)
+    now = datetime.now(timezone.utc)
+
+    @admin_firestore.transactional
+    def run(transaction) -> tuple[bool, Optional[datetime]]:
+        snapshot = ref.get(transaction=transaction)
+        data = (snapshot.to_dict() or {}) if snapshot.exists else {}
+        last_started = _parse_dt(data.get("last_started_at"))
+        if last_started and now - last_started < timedelta(seconds=interval_seconds * 0.9):
+            return False, last_started
+        lease_until = _parse_dt(data.get("lease_until"))
+        if data.get("holder") not in (None, _HOLDER_ID) and lease_until and lease_until > now:
+            return False, last_started
+        transaction.set(
+            ref,
+            {
+                "holder": _HOLDER_ID,
+                "lease_until": (now + timedelta(seconds=max(60.0, interval_seconds))).isoformat(),
+            },
+            merge=True,
+        )
+        return True, last_started
+
+    return run(db.transaction())
+
+
+def _complete_lease(name: str, started_at: datetime) -> None:
+    db = get_firestore_client()
+    db.collection(_LEASES_COLLECTION).document(name).set(
+        {
+            "holder": None,
+            "lease_until": None,
+            "last_started_at": started_at.isoformat(),
+            "last_completed_at": datetime.now(timezone.utc).isoformat(),
+        },
+        merge=True,
+    )
+
+
+def _parse_dt(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
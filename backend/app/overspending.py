@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import calendar
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set
+
+from firebase_admin import firestore as admin_firestore
+
+from .config import Settings
+from .firebase import get_firestore_client
+from .fx import DEFAULT_BASE_CURRENCY, DEFAULT_CURRENCY, conversion_factor, get_cbu_rates
+from .notifications import (
+    OverspendingNotificationRequest,
+    OverspendingNotificationResponse,
+    create_overspending_notification,
+)
+from .rollups import iter_cells, load_rollups, month_id, wallet_currencies
+from .wallets import parse_amount
+
+# Same pacing rule as the app's home screen: warn once month-to-date spending is
+# more than 5% over the budget spread evenly across the month.
+OVERSPENDING_TOLERANCE = 1.05
+_PLAN_MONTHLY_FACTORS = {"Monthly": 1.0, "Yearly": 1 / 12, "Weekly": 4.345}
+
+
+def monthly_budget_limit(plan: Dict[str, Any]) -> float:
+    total = sum(
+        parse_amount(item.get("amount"))
+        for item in plan.get("budgets") or []
+        if isinstance(item, dict)
+    )
+    if total <= 0:
+        return 0.0
+    return total * _PLAN_MONTHLY_FACTORS.get(str(plan.get("type") or ""), 1.0)
+
+
+def latest_plan_budget(user_ref) -> Optional[Dict[str, Any]]:
+    docs = list(
+        user_ref.collection("planBudgets")
+        .order_by("create_at", direction=admin_firestore.Query.DESCENDING)
+        .limit(1)
+        .stream()
+    )
+    return (docs[0].to_dict() or {}) if docs else None
+
+
+def users_with_plan_budgets(db) -> Set[str]:
+    return {
+        doc.reference.parent.parent.id
+        for doc in db.collection_group("planBudgets").select([]).stream()
+    }
+
+
+def evaluate_overspending(
+    uid: str,
+    settings: Settings,
+    *,
+    now: Optional[datetime] = None,
+    language: Optional[str] = None,
+) -> OverspendingNotificationResponse:
+    """Compare this month's spending (from the rollups) with the plan budget's pace.
+
+    Raises the `overspending_warning` notification (deduped per day) when ahead of
+    pace. Days and months are UTC, like the rollups. Spending in a currency without
+    a CBU rate makes the total meaningless, so nothing is raised then.
+    """
+    today = (now or datetime.now(timezone.utc)).date()
+    db = get_firestore_client()
+    user_ref = db.collection("users").document(uid)
+    plan = latest_plan_budget(user_ref)
+    limit = monthly_budget_limit(plan) if plan else 0.0
+    if limit <= 0:
+        return OverspendingNotificationResponse(triggered=False, reason="no_budget")
+    expected = limit * today.day / calendar.monthrange(today.year, today.month)[1]
+
+    profile = user_ref.get().to_dict() or {}
+    currency = str(profile.get("currency") or DEFAULT_CURRENCY).strip().upper()
+    currencies = wallet_currencies(
+        user_ref, str(profile.get("baseCurrency") or DEFAULT_BASE_CURRENCY).strip().upper()
+    )
+    rates: Optional[Dict[str, float]] = None
+    spent = 0.0
+    for rollup in load_rollups(db, user_ref, [month_id(today)]):
+        for code, _day, cell in iter_cells(rollup, "days", currencies):
+            amount = parse_amount(cell.get("expense"))
+            if amount and code != currency:
+                if rates is None:
+                    rates = get_cbu_rates(settings).get("rates") or {}
+                factor = conversion_factor(code, currency, rates)
+                if factor is None:
+                    return OverspendingNotificationResponse(
+                        triggered=False, reason="unconverted_currency"
+                    )
+                amount *= factor
+            spent += amount
+
+    if spent <= expected * OVERSPENDING_TOLERANCE:
+        return OverspendingNotificationResponse(triggered=False, reason="below_threshold")
+    return create_overspending_notification(
+        uid,
+        OverspendingNotificationRequest(
+            period_key=today.isoformat(),
+            actual_spent=round(spent, 2),
+            expected_spent=round(expected, 2),
+            currency=currency,
+            language=language or profile.get("language"),
+        ),
+    )
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from firebase_admin import firestore as admin_firestore
+
+from .wallets import parse_amount
+
+# Per-user monthly rollups at users/{uid}/rollups/{YYYY-MM}:
+#   days:       {wallet_id: {currency: {DD: {income, expense}}}}
+#   categories: {wallet_id: {currency: {category_id: {income, expense}}}}
+#   category_meta: {category_id: {name, icon}}
+# Cells are split by wallet so deleted wallets can be skipped at read time, and by
+# currency so conversion happens at read time with current rates. Transactions
+# without a currency land under "_" and, as in the app, are in their wallet's
+# currency; that is resolved at read time too (see `iter_cells`). Days are UTC.
+# A `_meta` doc marks the rollups as built from the full transaction history; they
+# only see writes made since they were introduced until scripts/backfill_rollups.py
+# has run for the user.
+ROLLUPS_COLLECTION = "rollups"
+ROLLUPS_META_DOC = "_meta"
+UNSPECIFIED_CURRENCY = "_"
+UNKNOWN_CATEGORY = "unknown"
+_KINDS = {"income": "income", "expensese": "expense"}
+_TX_FIELDS = ["type", "date", "balance", "currency", "category", "categoryId"]
+
+
+def _tx_datetime(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str) and value.strip():
+        raw = value.strip()
+        if raw.endswith("Z"):
+            raw = raw[:-1] + "+00:00"
+        try:
+            parsed = datetime.fromisoformat(raw)
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+
+def month_id(day: date) -> str:
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def _cell(tx: Dict[str, Any]) -> Optional[Tuple[str, str, str, str, str, str, float]]:
+    kind = _KINDS.get(str(tx.get("type") or "").strip().lower())
+    moment = _tx_datetime(tx.get("date"))
+    amount = parse_amount(tx.get("balance"))
+    wallet_id = str(tx.get("walletId") or "").strip()
+    if kind is None or moment is None or not amount or not wallet_id:
+        return None
+    day = moment.astimezone(timezone.utc).date()
+    currency = str(tx.get("currency") or "").strip().upper() or UNSPECIFIED_CURRENCY
+    category = tx.get("category") if isinstance(tx.get("category"), dict) else {}
+    category_id = str(category.get("id") or tx.get("categoryId") or "").strip() or UNKNOWN_CATEGORY
+    return month_id(day), f"{day.day:02d}", wallet_id, currency, category_id, kind, amount
+
+
+def _category_meta(tx: Dict[str, Any]) -> Dict[str, Any]:
+    category = tx.get("category") if isinstance(tx.get("category"), dict) else {}
+    return {key: category[key] for key in ("name", "icon") if category.get(key) is not None}
+
+
+def _accumulate(
+    transactions: Iterable[Dict[str, Any]],
+    wrap,
+) -> Dict[str, Dict[str, Any]]:
+    sums: Dict[tuple, float] = defaultdict(float)
+    meta: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+    for tx in transactions:
+        cell = _cell(tx)
+        if cell is None:
+            continue
+        month, day, wallet_id, currency, category_id, kind, amount = cell
+        sums[(month, "days", wallet_id, currency, day, kind)] += amount
+        sums[(month, "categories", wallet_id, currency, category_id, kind)] += amount
+        category_meta = _category_meta(tx)
+        if category_meta:
+            meta[month][category_id] = category_meta
+
+    docs: Dict[str, Dict[str, Any]] = {}
+    for (month, section, wallet_id, currency, key, kind), amount in sums.items():
+        doc = docs.setdefault(month, {"month": month})
+        node = doc.setdefault(section, {}).setdefault(wallet_id, {}).setdefault(currency, {})
+        node.setdefault(key, {})[kind] = wrap(amount)
+    for month, categories in meta.items():
+        docs.setdefault(month, {"month": month})["category_meta"] = categories
+    return docs
+
+
+def rollup_increments(transactions: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """{month_id: merge-set payload} that adds `transactions` to their monthly rollups."""
+    return _accumulate(transactions, admin_firestore.Increment)
+
+
+def rollup_ref(user_ref, month: str):
+    return user_ref.collection(ROLLUPS_COLLECTION).document(month)
+
+
+def write_rollup_increments(writer, user_ref, transactions: Iterable[Dict[str, Any]]) -> int:
+    """Stage the rollup updates on a batch or transaction; returns the writes added."""
+    updates = rollup_increments(transactions)
+    for month, fields in updates.items():
+        writer.set(rollup_ref(user_ref, month), fields, merge=True)
+    return len(updates)
+
+
+def rebuild_rollups(db, user_ref, *, force: bool = False) -> Optional[int]:
+    """Recompute every monthly rollup of a user from the transactions.
+
+    Returns months written, or None when `_meta` says they were already built and
+    `force` is off. Runs in one transaction that reads the existing rollups first,
+    so increments committed meanwhile land after it instead of being overwritten.
+    """
+    rollups = user_ref.collection(ROLLUPS_COLLECTION).select([])
+    wallets = user_ref.collection("wallets").select([])
+
+    @admin_firestore.transactional
+    def run(transaction) -> Optional[int]:
+        existing = {snapshot.id: snapshot for snapshot in transaction.get(rollups)}
+        meta = existing.pop(ROLLUPS_META_DOC, None)
+        if meta is not None and meta.exists and not force:
+            return None
+        transactions: List[Dict[str, Any]] = []
+        for wallet_doc in transaction.get(wallets):
+            query = wallet_doc.reference.collection("transactions").select(_TX_FIELDS)
+            for tx_doc in transaction.get(query):
+                tx = tx_doc.to_dict() or {}
+                tx["walletId"] = wallet_doc.id
+                transactions.append(tx)
+        docs = _accumulate(transactions, lambda amount: amount)
+        for month, fields in docs.items():
+            transaction.set(rollup_ref(user_ref, month), fields)
+        for month in set(existing) - set(docs):
+            transaction.delete(rollup_ref(user_ref, month))
+        transaction.set(
+            rollup_ref(user_ref, ROLLUPS_META_DOC),
+            {"rebuilt_at": datetime.now(timezone.utc).isoformat()},
+        )
+        return len(docs)
+
+    return run(db.transaction())
+
+
+def rollup_month(tx: Dict[str, Any]) -> Optional[str]:
+    cell = _cell(tx)
+    return cell[0] if cell else None
+
+
+def load_rollups(db, user_ref, months: List[str]) -> List[Dict[str, Any]]:
+    """Existing rollup docs for `months` (missing months are skipped)."""
+    snapshots = db.get_all([rollup_ref(user_ref, month) for month in months])
+    by_month = {snapshot.id: snapshot for snapshot in snapshots}
+    return [
+        by_month[month].to_dict() or {}
+        for month in months
+        if month in by_month and by_month[month].exists
+    ]
+
+
+def wallet_currencies(user_ref, fallback: str) -> Dict[str, str]:
+    """{wallet_id: currency} of the user's existing wallets; `fallback` (the
+    profile's baseCurrency) for wallets without one, like the app."""
+    currencies: Dict[str, str] = {}
+    for doc in user_ref.collection("wallets").select(["currency"]).stream():
+        code = str((doc.to_dict() or {}).get("currency") or "").strip().upper()
+        currencies[doc.id] = code or fallback
+    return currencies
+
+
+def iter_cells(
+    rollup: Dict[str, Any],
+    section: str,
+    currencies: Mapping[str, str],
+) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """(currency, key, {income, expense}) of a rollup section ("days" or
+    "categories") for the wallets in `currencies`, with "_" resolved to the
+    wallet's currency."""
+    for wallet_id, by_currency in (rollup.get(section) or {}).items():
+        wallet_currency = currencies.get(wallet_id)
+        if wallet_currency is None:
+            continue
+        for currency, cells in (by_currency or {}).items():
+            code = wallet_currency if currency == UNSPECIFIED_CURRENCY else currency
+            for key, cell in (cells or {}).items():
+                yield code, key, cell or {}
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Tuple
+
+from firebase_admin import firestore as admin_firestore
+
+# Running totals kept on each wallet doc next to its opening `balance`, so the
+# available balance is one document read instead of a scan of its transactions.
+# Wallets written before these existed are recomputed once (see
+# `wallet_totals_in_transaction` and scripts/backfill_wallet_totals.py).
+TOTALS_INITIALIZED = "totals_initialized"
+TRANSACTIONS_TOTAL = "transactions_total"
+TRANSACTION_COUNT = "transaction_count"
+
+
+def parse_amount(value: Any) -> float:
+    try:
+        parsed = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return parsed if parsed == parsed else 0.0
+
+
+def transaction_delta(tx: Dict[str, Any]) -> float:
+    tx_type = str(tx.get("type") or "").strip().lower()
+    if tx_type == "income":
+        return parse_amount(tx.get("balance"))
+    if tx_type == "expensese":
+        return -parse_amount(tx.get("balance"))
+    return 0.0
+
+
+def sum_transactions(transactions: Iterable[Dict[str, Any]]) -> Tuple[float, int]:
+    total = 0.0
+    count = 0
+    for tx in transactions:
+        total += transaction_delta(tx)
+        count += 1
+    return total, count
+
+
+def available_balance(wallet: Dict[str, Any], transactions_total: float) -> float:
+    return parse_amount(wallet.get("balance")) + transactions_total
+
+
+def totals_fields(transactions_total: float, transaction_count: int) -> Dict[str, Any]:
+    return {
+        TRANSACTIONS_TOTAL: transactions_total,
+        TRANSACTION_COUNT: transaction_count,
+        TOTALS_INITIALIZED: True,
+    }
+
+
+def stored_totals(wallet: Dict[str, Any]) -> Tuple[float, int]:
+    return parse_amount(wallet.get(TRANSACTIONS_TOTAL)), int(wallet.get(TRANSACTION_COUNT) or 0)
+
+
+def wallet_totals_in_transaction(transaction, wallet_ref, wallet: Dict[str, Any]) -> Tuple[float, int]:
+    """Current (transactions_total, transaction_count) for a wallet read in `transaction`.
+
+    Uses the materialized fields when present; otherwise sums the transactions
+    inside the same transaction (once per wallet, the caller then writes them back).
+    """
+    if wallet.get(TOTALS_INITIALIZED):
+        return stored_totals(wallet)
+    query = wallet_ref.collection("transactions").select(["balance", "type"])
+    return sum_transactions(snap.to_dict() or {} for snap in transaction.get(query))
+
+
+def backfill_wallet_totals(db, wallet_ref, *, force: bool = False) -> bool:
+    @admin_firestore.transactional
+    def run(transaction) -> bool:
+        snapshot = wallet_ref.get(transaction=transaction)
+        if not snapshot.exists:
+            return False
+        wallet = snapshot.to_dict() or {}
+        if wallet.get(TOTALS_INITIALIZED) and not force:
+            return False
+        if force:
+            wallet = {**wallet, TOTALS_INITIALIZED: False}
+        total, count = wallet_totals_in_transaction(transaction, wallet_ref, wallet)
+        transaction.set(wallet_ref, totals_fields(total, count), merge=True)
+        return True
+
+    return run(db.transaction())
+
+
+def read_wallet_totals(wallet_ref, wallet: Dict[str, Any]) -> Tuple[float, int]:
+    """(transactions_total, transaction_count) for an already-read wallet, without writing.
+
+    Wallets not backfilled yet are summed on the fly; the backfill script (or the
+    wallet's next API write) materializes them.
+    """
+    if wallet.get(TOTALS_INITIALIZED):
+        return stored_totals(wallet)
+    query = wallet_ref.collection("transactions").select(["balance", "type"])
+    return sum_transactions(snap.to_dict() or {} for snap in query.stream())
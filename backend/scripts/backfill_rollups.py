@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import argparse
+
+from app.config import get_settings
+from app.firebase import init_firebase, get_firestore_client
+from app.rollups import rebuild_rollups
+
+
+def backfill(uid: str | None, force: bool) -> None:
+    settings = get_settings()
+    init_firebase(settings)
+    db = get_firestore_client()
+
+    if uid:
+        user_refs = [db.collection("users").document(uid)]
+    else:
+        user_refs = [doc.reference for doc in db.collection("users").stream()]
+
+    updated = 0
+    skipped = 0
+    for user_ref in user_refs:
+        months = rebuild_rollups(db, user_ref, force=force)
+        if months is None:
+            skipped += 1
+        else:
+            updated += 1
+            print(f"[update] {user_ref.id}: {months} months")
+    print(f"Done: {updated} users rebuilt, {skipped} already had rollups.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Build users/{uid}/rollups from the full transaction history."
+    )
+    parser.add_argument("--uid", help="Only rebuild rollups of this user.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild even users whose rollups were already built.",
+    )
+    args = parser.parse_args()
+    backfill(uid=args.uid, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import argparse
+
+from app.config import get_settings
+from app.firebase import init_firebase, get_firestore_client
+from app.wallets import backfill_wallet_totals
+
+
+def backfill(uid: str | None, force: bool) -> None:
+    settings = get_settings()
+    init_firebase(settings)
+    db = get_firestore_client()
+
+    if uid:
+        user_refs = [db.collection("users").document(uid)]
+    else:
+        user_refs = [doc.reference for doc in db.collection("users").stream()]
+
+    updated = 0
+    skipped = 0
+    for user_ref in user_refs:
+        for wallet_doc in user_ref.collection("wallets").stream():
+            if backfill_wallet_totals(db, wallet_doc.reference, force=force):
+                updated += 1
+                print(f"[update] {user_ref.id}/{wallet_doc.id}")
+            else:
+                skipped += 1
+    print(f"Done: {updated} wallets updated, {skipped} already had totals.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Materialize transactions_total / transaction_count on wallet docs."
+    )
+    parser.add_argument("--uid", help="Only backfill wallets of this user.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompute even wallets that already have totals.",
+    )
+    args = parser.parse_args()
+    backfill(uid=args.uid, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
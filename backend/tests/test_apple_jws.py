@@ -0,0 +1,116 @@
+import base64
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.serialization import Encoding
+from cryptography.x509.oid import NameOID
+
+from app.apple_jws import AppleJWSError, verify_signed_transaction
+
+LEAF_MARKER = x509.ObjectIdentifier("1.2.840.113635.100.6.11.1")
+INTERMEDIATE_MARKER = x509.ObjectIdentifier("1.2.840.113635.100.6.2.1")
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def _cert(name, key, issuer_name, issuer_key, *, marker=None, ca=False, not_after=None):
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)]))
+        .issuer_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, issuer_name)]))
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(NOW - timedelta(days=365))
+        .not_valid_after(not_after or NOW + timedelta(days=365))
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+    )
+    if marker is not None:
+        builder = builder.add_extension(x509.UnrecognizedExtension(marker, b"\x05\x00"), critical=False)
+    return builder.sign(issuer_key, hashes.SHA256())
+
+
+def _chain(*, leaf_marker=LEAF_MARKER, leaf_not_after=None):
+    root_key = ec.generate_private_key(ec.SECP256R1())
+    intermediate_key = ec.generate_private_key(ec.SECP256R1())
+    leaf_key = ec.generate_private_key(ec.SECP256R1())
+    root = _cert("Test Root", root_key, "Test Root", root_key, ca=True)
+    intermediate = _cert(
+        "Test WWDR", intermediate_key, "Test Root", root_key, marker=INTERMEDIATE_MARKER, ca=True
+    )
+    leaf = _cert(
+        "Test Leaf",
+        leaf_key,
+        "Test WWDR",
+        intermediate_key,
+        marker=leaf_marker,
+        not_after=leaf_not_after,
+    )
+    return root, [leaf, intermediate, root], leaf_key
+
+
+def _sign(chain, key, *, signed_at=NOW):
+    payload = {
+        "transactionId": "2000000000000001",
+        "originalTransactionId": "2000000000000001",
+        "productId": "monthly_premium",
+        "signedDate": int(signed_at.timestamp() * 1000),
+    }
+    x5c = [base64.b64encode(cert.public_bytes(Encoding.DER)).decode("ascii") for cert in chain]
+    return jwt.encode(payload, key, algorithm="ES256", headers={"x5c": x5c})
+
+
+def test_accepts_chain_anchored_in_root():
+    root, chain, leaf_key = _chain()
+    payload = verify_signed_transaction(_sign(chain, leaf_key), root, now=NOW)
+    assert payload["productId"] == "monthly_premium"
+
+
+def test_rejects_payload_signed_by_other_key():
+    root, chain, _leaf_key = _chain()
+    other_key = ec.generate_private_key(ec.SECP256R1())
+    with pytest.raises(AppleJWSError):
+        verify_signed_transaction(_sign(chain, other_key), root, now=NOW)
+
+
+def test_rejects_chain_from_other_root():
+    _root, chain, leaf_key = _chain()
+    other_root, _other_chain, _other_key = _chain()
+    with pytest.raises(AppleJWSError):
+        verify_signed_transaction(_sign(chain, leaf_key), other_root, now=NOW)
+
+
+def test_rejects_intermediate_not_signed_by_root():
+    root, chain, leaf_key = _chain()
+    _other_root, other_chain, _other_key = _chain()
+    forged = [chain[0], other_chain[1], root]
+    with pytest.raises(AppleJWSError):
+        verify_signed_transaction(_sign(forged, leaf_key), root, now=NOW)
+
+
+def test_rejects_leaf_without_marker_extension():
+    root, chain, leaf_key = _chain(leaf_marker=None)
+    with pytest.raises(AppleJWSError):
+        verify_signed_transaction(_sign(chain, leaf_key), root, now=NOW)
+
+
+def test_rejects_transaction_signed_after_leaf_expiry():
+    root, chain, leaf_key = _chain(leaf_not_after=NOW - timedelta(days=1))
+    with pytest.raises(AppleJWSError):
+        verify_signed_transaction(_sign(chain, leaf_key), root, now=NOW)
+
+
+def test_accepts_old_transaction_after_leaf_expiry():
+    root, chain, leaf_key = _chain(leaf_not_after=NOW - timedelta(days=1))
+    signed_at = NOW - timedelta(days=30)
+    payload = verify_signed_transaction(_sign(chain, leaf_key, signed_at=signed_at), root, now=NOW)
+    assert payload["transactionId"] == "2000000000000001"
+
+
+def test_rejects_missing_chain():
+    root, _chain_certs, leaf_key = _chain()
+    token = jwt.encode({"signedDate": 1}, leaf_key, algorithm="ES256")
+    with pytest.raises(AppleJWSError):
+        verify_signed_transaction(token, root, now=NOW)
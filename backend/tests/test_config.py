@@ -0,0 +1,45 @@
+import pytest
+from pydantic import ValidationError
+
+from app.config import CompiledSettings, Settings
+
+REQUIRED = {
+    "google_web_client_id": "web",
+    "firebase_project_id": "project",
+    "firebase_service_account_path": "sa.json",
+    "muxlisa_voice_text_api_key": "key",
+}
+
+
+def _settings(**overrides):
+    return Settings(_env_file=None, **{**REQUIRED, **overrides})
+
+
+def test_compiled_settings_parse_lists_and_json():
+    settings = _settings(
+        admin_uids=" a, b ,,",
+        apple_bundle_id="com.example.app",
+        default_permissions_free='{"voice": false}',
+    )
+    compiled = settings.compiled
+
+    assert compiled.admin_uids == frozenset({"a", "b"})
+    assert compiled.apple_auth_audiences == frozenset({"com.example.app"})
+    assert compiled.default_permissions_free == {"voice": False}
+    assert settings.admin_uid_set is compiled.admin_uids
+
+
+def test_compiled_settings_are_read_only():
+    compiled = _settings(default_ads_config_ios='{"banner": {"enabled": true}}').compiled
+
+    with pytest.raises(ValidationError):
+        compiled.admin_uids = frozenset({"x"})
+    with pytest.raises(TypeError):
+        compiled.default_ads_config_ios["banner"] = {}
+    with pytest.raises(AttributeError):
+        compiled.admin_uids.add("x")
+
+
+def test_invalid_json_fails_at_compile_time():
+    with pytest.raises(ValueError, match="DEFAULT_PERMISSIONS_PREMIUM"):
+        CompiledSettings.from_settings(_settings(default_permissions_premium="[1]"))
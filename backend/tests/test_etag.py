@@ -0,0 +1,48 @@
+from starlette.requests import Request
+
+from app.api.etag import content_etag, etag_json_response, etag_matches, version_etag
+
+
+def _request(if_none_match=None):
+    headers = [] if if_none_match is None else [(b"if-none-match", if_none_match.encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_version_etag_is_weak_and_stable():
+    etag = version_etag("fx", "2025-03-01", None)
+    assert etag.startswith('W/"')
+    assert etag == version_etag("fx", "2025-03-01", None)
+    assert etag != version_etag("fx", "2025-03-02", None)
+
+
+def test_etag_matches_ignores_weakness_and_accepts_lists():
+    etag = version_etag("fx", 1)
+    opaque = etag[2:]
+    assert not etag_matches(_request(), etag)
+    assert etag_matches(_request(etag), etag)
+    assert etag_matches(_request(opaque), etag)
+    assert etag_matches(_request(f'"other", {opaque}'), etag)
+    assert etag_matches(_request("*"), etag)
+    assert not etag_matches(_request('"other"'), etag)
+
+
+def test_version_etag_match_skips_serialization():
+    def fail():
+        raise AssertionError("payload should not be serialized")
+
+    etag = version_etag("tariffs", 3)
+    response = etag_json_response(_request(etag), {"never": fail}, etag=etag)
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == etag
+
+
+def test_content_etag_round_trip():
+    response = etag_json_response(_request(), {"a": 1})
+    assert response.status_code == 200
+    assert response.body == b'{"a":1}'
+    assert response.headers["etag"] == content_etag(b'{"a":1}')
+
+    again = etag_json_response(_request(response.headers["etag"]), {"a": 1})
+    assert again.status_code == 304
@@ -0,0 +1,37 @@
+import pytest
+
+from app.fx import conversion_factor, convert_amount, convert_amounts
+
+# CBU rates: UZS per unit of currency.
+RATES = {"USD": 12000.0, "EUR": 13000.0}
+
+
+def test_conversion_factor():
+    assert conversion_factor("USD", "USD", {}) == 1.0
+    assert conversion_factor("USD", "UZS", RATES) == 12000.0
+    assert conversion_factor("UZS", "USD", RATES) == pytest.approx(1 / 12000)
+    assert conversion_factor("EUR", "USD", RATES) == pytest.approx(13000 / 12000)
+    assert conversion_factor("GBP", "USD", RATES) is None
+    assert conversion_factor("USD", "GBP", RATES) is None
+
+
+def test_convert_amount_falls_back_to_the_unconverted_amount():
+    assert convert_amount(2, "usd", "uzs", RATES) == 24000.0
+    assert convert_amount(2, "GBP", "UZS", RATES) == 2
+    assert convert_amount(2, "USD", "UZS", {}) == 2
+
+
+def test_convert_amounts_reports_currencies_without_a_rate():
+    converted, unconverted = convert_amounts(
+        [1, 12000, 5, 3], ["usd", "UZS", "GBP", "XYZ"], "usd", RATES
+    )
+
+    assert converted == [1.0, 1.0, None, None]
+    assert unconverted == ["GBP", "XYZ"]
+
+
+def test_convert_amounts_without_rates_only_keeps_the_target_currency():
+    converted, unconverted = convert_amounts([1, 2], ["USD", "EUR"], "USD", {})
+
+    assert converted == [1.0, None]
+    assert unconverted == ["EUR"]
@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app import overspending
+from app.notifications import OverspendingNotificationResponse
+from app.rollups import UNSPECIFIED_CURRENCY
+
+NOW = datetime(2025, 3, 10, tzinfo=timezone.utc)
+# 310 a month over 31 days: 100 expected by the 10th, 105 with the tolerance.
+PLAN = {"type": "Monthly", "budgets": [{"amount": 310}]}
+
+
+class _Snapshot:
+    def __init__(self, data):
+        self._data = data
+
+    def to_dict(self):
+        return self._data
+
+
+class _UserRef:
+    def __init__(self, profile):
+        self._profile = profile
+
+    def get(self):
+        return _Snapshot(self._profile)
+
+
+class _Db:
+    def __init__(self, profile):
+        self._profile = profile
+
+    def collection(self, name):
+        return self
+
+    def document(self, uid):
+        return _UserRef(self._profile)
+
+
+@pytest.fixture
+def evaluate(monkeypatch):
+    def run(profile, wallets, days, rates=None):
+        sent = []
+        monkeypatch.setattr(overspending, "get_firestore_client", lambda: _Db(profile))
+        monkeypatch.setattr(overspending, "latest_plan_budget", lambda user_ref: PLAN)
+        monkeypatch.setattr(
+            overspending, "wallet_currencies", lambda user_ref, fallback: wallets(fallback)
+        )
+        monkeypatch.setattr(
+            overspending, "load_rollups", lambda db, user_ref, months: [{"days": days}]
+        )
+        monkeypatch.setattr(
+            overspending, "get_cbu_rates", lambda settings: {"rates": rates or {}}
+        )
+
+        def notify(uid, payload):
+            sent.append(payload)
+            return OverspendingNotificationResponse(triggered=True)
+
+        monkeypatch.setattr(overspending, "create_overspending_notification", notify)
+        result = overspending.evaluate_overspending("u1", None, now=NOW)
+        return result, sent
+
+    return run
+
+
+def test_monthly_budget_limit():
+    assert overspending.monthly_budget_limit(PLAN) == 310
+    assert overspending.monthly_budget_limit({"type": "Yearly", "budgets": [{"amount": 120}]}) == 10
+    assert overspending.monthly_budget_limit({"budgets": []}) == 0.0
+
+
+def test_untagged_spending_uses_the_wallet_currency(evaluate):
+    # 110 USD in a USD wallet is over pace; read as UZS it would be ~0.01 USD.
+    result, sent = evaluate(
+        {"currency": "USD", "baseCurrency": "UZS"},
+        lambda fallback: {"w1": "USD"},
+        {"w1": {UNSPECIFIED_CURRENCY: {"05": {"expense": 110}}}},
+        rates={"USD": 12000.0},
+    )
+
+    assert result.triggered
+    assert sent[0].actual_spent == 110
+    assert sent[0].currency == "USD"
+
+
+def test_profile_currency_defaults_to_usd(evaluate):
+    result, sent = evaluate(
+        {},
+        lambda fallback: {"w1": fallback},
+        {"w1": {UNSPECIFIED_CURRENCY: {"05": {"expense": 1_320_000}}}},
+        rates={"USD": 12000.0},
+    )
+
+    assert result.triggered
+    assert sent[0].currency == "USD"
+    assert sent[0].actual_spent == 110
+
+
+def test_spending_without_a_rate_is_not_guessed(evaluate):
+    result, sent = evaluate(
+        {"currency": "USD"},
+        lambda fallback: {"w1": "GBP"},
+        {"w1": {UNSPECIFIED_CURRENCY: {"05": {"expense": 1}}}},
+        rates={"USD": 12000.0},
+    )
+
+    assert result.reason == "unconverted_currency"
+    assert sent == []
+
+
+def test_below_threshold(evaluate):
+    result, sent = evaluate(
+        {"currency": "USD"},
+        lambda fallback: {"w1": "USD"},
+        {"w1": {"USD": {"05": {"expense": 105}}}},
+    )
+
+    assert result.reason == "below_threshold"
+    assert sent == []
@@ -0,0 +1,83 @@
+from datetime import date
+
+from app.rollups import UNSPECIFIED_CURRENCY, _accumulate, iter_cells, month_id
+
+
+def _tx(**fields):
+    tx = {
+        "type": "expensese",
+        "date": "2025-03-05T10:00:00Z",
+        "balance": 10,
+        "walletId": "w1",
+        "category": {"id": "food", "name": "Food"},
+    }
+    tx.update(fields)
+    return tx
+
+
+def test_month_id():
+    assert month_id(date(2025, 3, 5)) == "2025-03"
+
+
+def test_accumulate_sums_days_and_categories_per_wallet_and_currency():
+    docs = _accumulate(
+        [
+            _tx(),
+            _tx(balance="5.5", currency="usd"),
+            _tx(type="income", balance=100, currency="USD"),
+            _tx(walletId="w2", category=None, categoryId="rent"),
+        ],
+        lambda amount: amount,
+    )
+
+    assert sorted(docs) == ["2025-03"]
+    march = docs["2025-03"]
+    assert march["days"]["w1"][UNSPECIFIED_CURRENCY] == {"05": {"expense": 10.0}}
+    assert march["days"]["w1"]["USD"] == {"05": {"expense": 5.5, "income": 100.0}}
+    assert march["categories"]["w2"][UNSPECIFIED_CURRENCY] == {"rent": {"expense": 10.0}}
+    assert march["category_meta"] == {"food": {"name": "Food"}}
+
+
+def test_accumulate_buckets_by_utc_day():
+    docs = _accumulate([_tx(date="2025-04-01T00:00:00+05:00")], lambda amount: amount)
+
+    assert list(docs) == ["2025-03"]
+    assert docs["2025-03"]["days"]["w1"][UNSPECIFIED_CURRENCY] == {"31": {"expense": 10.0}}
+
+
+def test_accumulate_skips_unusable_transactions():
+    docs = _accumulate(
+        [
+            _tx(type="transfer"),
+            _tx(date="not a date"),
+            _tx(balance=0),
+            _tx(walletId=""),
+        ],
+        lambda amount: amount,
+    )
+    assert docs == {}
+
+
+def test_iter_cells_resolves_untagged_cells_to_the_wallet_currency():
+    rollup = {
+        "days": {
+            "w1": {
+                UNSPECIFIED_CURRENCY: {"01": {"expense": 10}},
+                "USD": {"02": {"income": 5}},
+            },
+            "w2": {UNSPECIFIED_CURRENCY: {"03": {"expense": 1}}},
+            "deleted": {UNSPECIFIED_CURRENCY: {"04": {"expense": 99}}},
+        }
+    }
+
+    cells = sorted(iter_cells(rollup, "days", {"w1": "EUR", "w2": "UZS"}))
+
+    assert cells == [
+        ("EUR", "01", {"expense": 10}),
+        ("USD", "02", {"income": 5}),
+        ("UZS", "03", {"expense": 1}),
+    ]
+
+
+def test_iter_cells_handles_missing_sections():
+    assert list(iter_cells({}, "categories", {"w1": "USD"})) == []
@@ -0,0 +1,32 @@
+from datetime import date
+
+from app.api.routes.legacy import _add_months, _stats_bucket_offsets, _stats_range
+
+
+def test_add_months_crosses_years():
+    assert _add_months(date(2025, 11, 30), 3) == date(2026, 2, 1)
+    assert _add_months(date(2025, 1, 15), -1) == date(2024, 12, 1)
+
+
+def test_default_ranges_end_on_the_given_day():
+    end = date(2025, 3, 12)  # a Wednesday
+    assert _stats_range("day", None, end) == (date(2025, 2, 11), end)
+    assert _stats_range("week", None, end) == (date(2024, 12, 23), date(2025, 3, 16))
+    assert _stats_range("month", None, end) == (date(2024, 4, 1), date(2025, 3, 31))
+
+
+def test_explicit_ranges_snap_to_whole_buckets():
+    assert _stats_range("week", date(2025, 3, 5), date(2025, 3, 12)) == (
+        date(2025, 3, 3),
+        date(2025, 3, 16),
+    )
+    assert _stats_range("month", date(2025, 1, 20), date(2025, 2, 3)) == (
+        date(2025, 1, 1),
+        date(2025, 2, 28),
+    )
+
+
+def test_bucket_offsets():
+    assert _stats_bucket_offsets("day", date(2025, 3, 1), date(2025, 3, 3)) == [0, 1, 2]
+    assert _stats_bucket_offsets("week", date(2025, 3, 3), date(2025, 3, 16)) == [0, 7]
+    assert _stats_bucket_offsets("month", date(2025, 1, 1), date(2025, 3, 31)) == [0, 31, 59]
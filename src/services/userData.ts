@@ -5,6 +5,7 @@ import {
   deleteDoc,
   getDoc,
   getDocs,
+  increment,
   setDoc,
   updateDoc,
   writeBatch,
@@ -60,6 +61,9 @@ type WalletDoc = {
   balance: number;
   currency?: CurrencyEnumType;
   image?: string | null;
+  transactions_total?: number;
+  transaction_count?: number;
+  totals_initialized?: boolean;
 };
 
 type NoteDoc = {
@@ -564,6 +568,9 @@ export const createWalletForUser = async (payload: {
       title: payload.title,
       balance: payload.balance,
       image: payload.image ?? null,
+      transactions_total: 0,
+      transaction_count: 0,
+      totals_initialized: true,
     };
     if (payload.currency) {
       walletDoc.currency = payload.currency;
@@ -607,6 +614,33 @@ export const deleteWalletForUser = async (walletId: number | string) => {
   });
 };
 
+// Mirrors backend/app/rollups.py: users/{uid}/rollups/{YYYY-MM}, UTC days, cells
+// split by wallet and currency ('_' when the transaction has none).
+const rollupUpdate = (tx: TransactionDoc) => {
+  const kind = tx.type === 'income' ? 'income' : tx.type === 'expensese' ? 'expense' : null;
+  const moment = new Date(tx.date);
+  const amount = Number(tx.balance);
+  if (!kind || Number.isNaN(moment.getTime()) || !amount || !tx.walletId) {
+    return null;
+  }
+  const month = `${moment.getUTCFullYear()}-${String(moment.getUTCMonth() + 1).padStart(2, '0')}`;
+  const day = String(moment.getUTCDate()).padStart(2, '0');
+  const currency = String(tx.currency ?? '').trim().toUpperCase() || '_';
+  const categoryId = String(tx.category?.id ?? tx.categoryId ?? '').trim() || 'unknown';
+  const meta: Record<string, unknown> = {};
+  if (tx.category?.name != null) meta.name = tx.category.name;
+  if (tx.category?.icon != null) meta.icon = tx.category.icon;
+  const data: Record<string, unknown> = {
+    month,
+    days: { [tx.walletId]: { [currency]: { [day]: { [kind]: increment(amount) } } } },
+    categories: { [tx.walletId]: { [currency]: { [categoryId]: { [kind]: increment(amount) } } } },
+  };
+  if (Object.keys(meta).length > 0) {
+    data.category_meta = { [categoryId]: meta };
+  }
+  return { month, data };
+};
+
 export const addTransactionForUser = async (params: {
   walletId: number | string;
   categoryId: number | string;
@@ -636,7 +670,20 @@ export const addTransactionForUser = async (params: {
       category: params.category,
     };
     const txDoc = serializeTransaction(transaction, user.uid, walletId);
-    await setDoc(txRef, txDoc);
+    // Keep the wallet's running totals (read by the backend balance check) in step.
+    const delta =
+      params.type === 'income' ? params.balance : params.type === 'expensese' ? -params.balance : 0;
+    const batch = writeBatch(db);
+    batch.set(txRef, txDoc);
+    batch.update(doc(db, 'users', user.uid, 'wallets', walletId), {
+      transactions_total: increment(delta),
+      transaction_count: increment(1),
+    });
+    const rollup = rollupUpdate(txDoc);
+    if (rollup) {
+      batch.set(doc(db, 'users', user.uid, 'rollups', rollup.month), rollup.data, { merge: true });
+    }
+    await batch.commit();
     return {
       ...transaction,
       note: deserializeNote(txDoc.note ?? null),
@@ -750,6 +797,7 @@ export const clearUserDataForUser = async (): Promise<void> => {
     await deleteCollection(collection(db, 'users', user.uid, 'planBudgets'));
     await deleteCollection(collection(db, 'users', user.uid, 'budgets'));
     await deleteCollection(collection(db, 'users', user.uid, 'bills'));
+    await deleteCollection(collection(db, 'users', user.uid, 'rollups'));
 
     await deleteDoc(userRef);
   });